@@ -1,11 +1,77 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import streamlit as st
-from openai import OpenAI
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
+from contextlib import contextmanager
+from datetime import datetime
 import os
-import time
 import json
+import threading
+import queue
+from random import randrange
+from leaderboard_store import (
+    SHEETS_SCOPE, LOCAL_KEY_FILE, LOCAL_SHEET_URL,
+    LEADERBOARD_HEADERS, SUMMARY_WORKSHEET,
+    entry_to_row, topic_scope,
+    build_summary, summary_to_rows, records_to_summary, merge_into_summary,
+    new_submission_id, ColumnarLeaderboard, rank_with_entries
+)
+from rooms import RoomRegistry
+from player_stats import PlayerStatsStore
+from score_analytics import ScoreDistribution
+from circuit_breaker import CircuitBreaker
+from shared_state import open_shared_state
+from telemetry import AnswerEventLog
+from trivia_questions import (
+    request_question, parse_trivia_response, question_key, load_question_bank,
+    QuestionVerifier, TokenAccountant, HedgedRequester
+)
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+# Set TRIVIA_PROFILE_STARTUP=1 to report per-subsystem startup costs and
+# per-answer latency overheads,
+# TRIVIA_WARMUP=1 to initialize heavy clients in the background at boot
+PROFILE_STARTUP = os.getenv("TRIVIA_PROFILE_STARTUP") == "1"
+WARMUP_ON_START = os.getenv("TRIVIA_WARMUP") == "1"
+# Set TRIVIA_VERIFY_ANSWERS=1 to fact-check answer keys in the background
+VERIFY_ANSWERS = os.getenv("TRIVIA_VERIFY_ANSWERS") == "1"
+VERIFY_WAIT_SECONDS = 1.5  # longest check_answer() waits for a pending verdict
+OPENAI_TIMEOUT_SECONDS = 20
+RECENT_QUESTIONS_PER_TOPIC = 200  # kept per topic to serve while OpenAI is down
+QUESTION_FIELDS = ("question", "choices", "correct", "fact_check")  # as parsed from the model
+# Set TRIVIA_SHARED_STATE=sqlite:///trivia_state.db to share snapshots, recent
+# questions, rate limits and refresh locks between app processes on one host
+SHARED_STATE_URL = os.getenv("TRIVIA_SHARED_STATE", "memory")
+# Player stats rows; point this at the TRIVIA_SHARED_STATE file to keep everything in one place
+PLAYER_STATS_URL = os.getenv("TRIVIA_PLAYER_STATS", "sqlite:///player_stats.db")
+SNAPSHOT_MAX_AGE = 5 * 60  # seconds a leaderboard/summary snapshot is served before a refresh
+SUMMARY_LOCK_WAIT = 10  # seconds a summary writer waits for the one before it
+# Set TRIVIA_OPENAI_RPM to cap question requests per minute across all processes
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("TRIVIA_OPENAI_RPM", "0"))
+OPENAI_SLOT_WAIT = 5  # seconds to wait for a rate-limit token before falling back
+
+
+@st.cache_resource(show_spinner=False)
+def get_startup_profile():
+    """Process-wide record of first-time import and initialization costs"""
+    return {}
+
+
+@contextmanager
+def profile_step(name):
+    """Time a block; the first (cold) measurement per process is kept"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if PROFILE_STARTUP:
+            profile = get_startup_profile()
+            if name not in profile:
+                profile[name] = time.perf_counter() - start
+                print(f"[startup] {name}: {profile[name] * 1000:.1f} ms")
+
 
 # Initialize OpenAI client using environment variable or Streamlit secrets
 def get_openai_key():
@@ -15,8 +81,37 @@ def get_openai_key():
     else:  # Streamlit Cloud
         return st.secrets["openai"]["OPENAI_API_KEY"]
 
-# Initialize OpenAI client
-client = OpenAI(api_key=get_openai_key())
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    """Create the OpenAI client the first time a question is needed"""
+    with profile_step("openai client"):
+        from openai import OpenAI
+        # Bounded timeouts: the circuit breaker, not the SDK, handles outages
+        return OpenAI(api_key=get_openai_key(), timeout=OPENAI_TIMEOUT_SECONDS, max_retries=1)
+
+
+@st.cache_resource(show_spinner=False)
+def get_circuit_breakers():
+    """One breaker per upstream dependency, shared by all sessions"""
+    return {
+        "openai": CircuitBreaker("openai", failure_threshold=5, reset_timeout=30),
+        "sheets": CircuitBreaker("sheets", failure_threshold=3, reset_timeout=60)
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_state():
+    """Snapshots, recent questions, rate limits and locks shared by every session
+    (and by every process when a SQLite file is configured)"""
+    return open_shared_state(SHARED_STATE_URL)
+
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_holder():
+    """This process's decoded copy of each shared snapshot, with its version"""
+    return {}
+
 
 # Set page configuration
 st.set_page_config(
@@ -30,6 +125,9 @@ st.set_page_config(
     }
 )
 
+if PROFILE_STARTUP:
+    get_startup_profile().setdefault("app imports", _IMPORT_SECONDS)
+
 # Hide Streamlit's default header, footer, and menu
 hide_streamlit_style = """
             <style>
@@ -38,6 +136,7 @@ hide_streamlit_style = """
             header {visibility: hidden;}
             </style>
             """
+_css_start = time.perf_counter()
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
 # Custom CSS for styling
@@ -123,6 +222,8 @@ st.markdown("""
     
     </style>
 """, unsafe_allow_html=True)
+if PROFILE_STARTUP:
+    get_startup_profile().setdefault("css injection", time.perf_counter() - _css_start)
 
 
 # Initialize session state
@@ -152,14 +253,40 @@ if 'last_sheet_load' not in st.session_state:
 # other session state initializations
 if 'sheet_object' not in st.session_state:
     st.session_state.sheet_object = None
+if 'leaderboard_summary' not in st.session_state:
+    st.session_state.leaderboard_summary = None
+if 'last_summary_load' not in st.session_state:
+    st.session_state.last_summary_load = None
 # Add to session state initialization section:
 if 'question_cache' not in st.session_state:
     st.session_state.question_cache = set()
+# Entries recorded locally but not yet appended to the sheet
+if 'pending_entries' not in st.session_state:
+    st.session_state.pending_entries = []
+if 'session_entries' not in st.session_state:
+    st.session_state.session_entries = []  # everything this session submitted
+# Id of the game in progress and the ids this session has already recorded
+# (ids are fresh uuids, so other sessions' rows can never match them)
+if 'submission_id' not in st.session_state:
+    st.session_state.submission_id = new_submission_id()
+if 'submitted_ids' not in st.session_state:
+    st.session_state.submitted_ids = set()
+if 'headers_checked' not in st.session_state:
+    st.session_state.headers_checked = False
+# Multiplayer room membership
+if 'room_code' not in st.session_state:
+    st.session_state.room_code = None
+if 'room_joined_game' not in st.session_state:
+    st.session_state.room_joined_game = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = new_submission_id()  # identifies this session in rooms
 
+@st.cache_resource(show_spinner=False)
 def load_and_resize_image(image_path, width=None, max_size=None):
-    """Load an image and resize it with maximum dimensions"""
+    """Load an image and resize it with maximum dimensions (once per process)"""
     try:
-        from PIL import Image
+        with profile_step("pil import"):
+            from PIL import Image
         image = Image.open(image_path)
         
         if max_size:
@@ -181,6 +308,18 @@ def load_and_resize_image(image_path, width=None, max_size=None):
         return None
 
 
+@st.cache_resource(show_spinner=False)
+def load_footer_image():
+    """Footer banner, stretched to a thin strip"""
+    footer_img = load_and_resize_image("FooterImage.png", width=800)
+    if footer_img is None:
+        return None
+    from PIL import Image
+    aspect_ratio = 0.02
+    new_height = int(800 * aspect_ratio)
+    return footer_img.resize((1200, new_height), Image.Resampling.LANCZOS)
+
+
 
 
 def is_running_on_streamlit():
@@ -188,92 +327,140 @@ def is_running_on_streamlit():
     checks = [
         hasattr(st, "secrets"),
         any(key.startswith("STREAMLIT_") for key in os.environ),
-        not os.path.exists("new-year-trivia-game-932d8241aa4e.json")
+        not os.path.exists(LOCAL_KEY_FILE)
     ]
     return any(checks)
 
 
 
-def authenticate_google_sheets():
-    """Authenticate with Google Sheets API and return sheet object"""
-    # Check if we have a cached sheet object
-    if st.session_state.sheet_object is not None:
-        return st.session_state.sheet_object
+def build_sheets_credentials(on_streamlit):
+    """Build service account credentials from Streamlit secrets or the local key file"""
+    from oauth2client.service_account import ServiceAccountCredentials
+    scope = SHEETS_SCOPE
     
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
+    if on_streamlit:
+        creds_dict = dict(st.secrets["gcp_service_account"])
+        
+        if "private_key" in creds_dict:
+            pk = creds_dict["private_key"]
+            if isinstance(pk, str):
+                pk = pk.replace('\\n', '\n').strip()
+                if not pk.endswith('\n'):
+                    pk += '\n'
+                creds_dict["private_key"] = pk
+        
+        return ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
     
+    return ServiceAccountCredentials.from_json_keyfile_name(
+        LOCAL_KEY_FILE, 
+        scope
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_sheets_pool():
+    """One authorized Sheets client per process, shared by all sessions"""
+    with profile_step("gspread import"):
+        from sheets_client import SheetsClientPool
+    on_streamlit = is_running_on_streamlit()
+    sheet_url = (st.secrets["google_sheets"]["url"] 
+                 if on_streamlit 
+                 else LOCAL_SHEET_URL)
+    return SheetsClientPool(lambda: build_sheets_credentials(on_streamlit), sheet_url,
+                            breaker=get_circuit_breakers()["sheets"])
+
+
+def authenticate_google_sheets():
+    """Authenticate with Google Sheets API and return sheet object.
+
+    A cached worksheet handle does not count toward the Sheets circuit
+    breaker; connect attempts do, and back off after a failure.
+    """
     try:
-        if is_running_on_streamlit():
-            creds_dict = dict(st.secrets["gcp_service_account"])
-            
-            if "private_key" in creds_dict:
-                pk = creds_dict["private_key"]
-                if isinstance(pk, str):
-                    pk = pk.replace('\\n', '\n').strip()
-                    if not pk.endswith('\n'):
-                        pk += '\n'
-                    creds_dict["private_key"] = pk
-            
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-            
-        else:
-            creds = ServiceAccountCredentials.from_json_keyfile_name(
-                "new-year-trivia-game-932d8241aa4e.json", 
-                scope
-            )
-            
-        client = gspread.authorize(creds)
-        sheet_url = (st.secrets["google_sheets"]["url"] 
-                    if is_running_on_streamlit() 
-                    else "https://docs.google.com/spreadsheets/d/1vs_JYu7HqmGiVUZjTdiDemVBhj3APV90Z5aa1jt56-g/edit#gid=0")
-        
-        spreadsheet = client.open_by_url(sheet_url)
-        # Cache the sheet object
-        st.session_state.sheet_object = spreadsheet.sheet1
+        # The pool connects once per process and refreshes itself as needed
+        with profile_step("sheets connect"):
+            st.session_state.sheet_object = get_sheets_pool().worksheet()
         return st.session_state.sheet_object
         
     except Exception as e:
+        print(f"Error connecting to Google Sheets: {str(e)}")
         return None
     
 
+def read_sheet_records(sheet, summary=False):
+    """get_all_records() of the leaderboard (or its summary worksheet)
+    behind the Sheets circuit breaker"""
+    breaker = get_circuit_breakers()["sheets"]
+    if sheet is None or not breaker.allow():
+        raise ConnectionError("Google Sheets is unavailable")
+    try:
+        worksheet = get_summary_sheet(sheet) if summary else sheet
+        if worksheet is None:
+            raise ConnectionError("Summary worksheet is unavailable")
+        records = worksheet.get_all_records()
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return records
+
+
+def snapshot_max_age(sheet, force_refresh=False):
+    """How old a shared snapshot may be; any age while Sheets is unreachable"""
+    if sheet is None or get_circuit_breakers()["sheets"].state == "open":
+        return float("inf")  # Serve the last good snapshot, do not wait on Sheets
+    return 0 if force_refresh else SNAPSHOT_MAX_AGE
+
+
+def load_shared_snapshot(key, max_age, compute, decode, label):
+    """(value, version) of a shared snapshot, refreshed by one process at a time
+    and decoded once per version per process; (None, None) if there is none"""
+    state = get_shared_state()
+    try:
+        version = state.single_flight(key, max_age, compute)
+    except Exception as e:
+        print(f"Error loading {label}: {str(e)}")
+        # Serve the last good snapshot instead of timing out again
+        current = state.version(key)
+        if current is None:
+            return None, None
+        version = current[0]
+    
+    holder = get_snapshot_holder()
+    decoded = holder.get(key)
+    if decoded is None or decoded[0] != version:
+        snapshot = state.get(key)
+        if snapshot is None:
+            return None, None
+        decoded = (snapshot[1], decode(snapshot[0]))
+        holder[key] = decoded
+    return decoded[1], decoded[0]
+
+
 def load_leaderboard(sheet, force_refresh=False):
-    """Load leaderboard data with caching"""
-    from datetime import datetime, timedelta
+    """Load leaderboard data with caching.
+
+    The leaderboard is a shared snapshot: at most one process reads the
+    sheet per refresh, and every session reuses it for up to 5 minutes.
+    Only the compressed columns are shared (the raw records are dropped as
+    soon as they are converted). The snapshot is read-only; games this
+    session submitted since are kept in session_entries.
+    """
+    leaderboard, _ = load_shared_snapshot(
+        "leaderboard",
+        snapshot_max_age(sheet, force_refresh),
+        lambda: ColumnarLeaderboard.from_records(read_sheet_records(sheet)).to_bytes(),
+        ColumnarLeaderboard.from_bytes,
+        "leaderboard"
+    )
+    if leaderboard is None:
+        return st.session_state.leaderboard_cache or ColumnarLeaderboard()
     
-    # Check if we have cached data and it's less than 5 minutes old
-    if (not force_refresh and 
-        st.session_state.leaderboard_cache is not None and 
-        st.session_state.last_sheet_load is not None and 
-        datetime.now() - st.session_state.last_sheet_load < timedelta(minutes=5)):
-        return st.session_state.leaderboard_cache
+    # Update cache
+    st.session_state.leaderboard_cache = leaderboard
+    st.session_state.last_sheet_load = datetime.now()
     
-    if sheet is None:
-        return {}
-        
-    try:
-        # Load from sheet
-        data = sheet.get_all_records()
-        leaderboard = {i: {
-            "name": row["Name"],
-            "score": row["Score"],
-            "topic": row["Topic"],
-            "date": row["Date"],
-            "time": row["Time"],
-            "questions_answered": row["Questions_Answered"],
-            "game_length": row["Game_Length"]
-        } for i, row in enumerate(data)}
-        
-        # Update cache
-        st.session_state.leaderboard_cache = leaderboard
-        st.session_state.last_sheet_load = datetime.now()
-        
-        return leaderboard
-    except Exception as e:
-        print(f"Error loading leaderboard: {str(e)}")
-        return {}
+    return leaderboard
 
 
 def save_leaderboard(sheet, leaderboard):
@@ -333,31 +520,24 @@ def save_leaderboard(sheet, leaderboard):
             time.sleep(wait_time)
  
 
-def update_leaderboard_entry(sheet, player_name, score, topic, questions_answered, game_length, force_write=False):
-    """Update leaderboard with local caching"""
+def update_leaderboard_entry(sheet, player_name, score, topic, questions_answered, game_length,
+                             force_write=False, submission_id=None):
+    """Update leaderboard with local caching.
+
+    Each game carries a unique submission id; ids already recorded are kept
+    in a set, so reruns, double clicks and retries are ignored in O(1)
+    while two distinct games with the same score are both kept.
+    """
     try:
-        from datetime import datetime
         current_time = datetime.now()
         
         # Format date and time
         date_str = current_time.strftime("%b %d, %Y")
         time_str = current_time.strftime("%I:%M %p")
         
-        # Get cached leaderboard or load if needed
-        leaderboard = st.session_state.leaderboard_cache
-        if leaderboard is None:
-            leaderboard = load_leaderboard(sheet)
-        
-        # Check for duplicate
-        duplicate_exists = any(
-            entry["name"] == player_name and
-            entry["topic"] == topic and
-            entry["score"] == score and
-            entry["date"] == date_str
-            for entry in leaderboard.values()
-        )
+        submission_id = submission_id or st.session_state.submission_id
         
-        if not duplicate_exists:
+        if submission_id not in st.session_state.submitted_ids:
             # Create new entry
             new_entry = {
                 "name": player_name,
@@ -366,180 +546,328 @@ def update_leaderboard_entry(sheet, player_name, score, topic, questions_answere
                 "date": date_str,
                 "time": time_str,
                 "questions_answered": questions_answered,
-                "game_length": game_length
+                "game_length": game_length,
+                "submission_id": submission_id
             }
             
-            # Add to local cache
-            next_index = max(leaderboard.keys(), default=-1) + 1
-            leaderboard[next_index] = new_entry
-            st.session_state.leaderboard_cache = leaderboard
+            st.session_state.submitted_ids.add(submission_id)
+            st.session_state.pending_entries.append(new_entry)
+            # The shared snapshot stays read-only; ranks add this session's games
+            st.session_state.session_entries.append(new_entry)
+            get_player_stats().record_game(player_name, topic, score)
+            record_score_distribution(score, topic)
             
             # Only write to sheet if forced (end of game)
             if force_write and sheet:
-                save_leaderboard_efficient(sheet, leaderboard)
+                flush_pending_entries(sheet)
             
             return True
+        
+        if force_write and sheet:
+            flush_pending_entries(sheet)
         return False
         
     except Exception as e:
         print(f"Error updating leaderboard: {str(e)}")
         return False
 
-def save_leaderboard_efficient(sheet, leaderboard):
-    """Efficient single-operation save to Google Sheet"""
+def ensure_leaderboard_headers(sheet):
+    """Make sure the sheet header has every column we write (once per session)"""
+    if st.session_state.headers_checked:
+        return
+    if sheet.row_values(1) != LEADERBOARD_HEADERS:
+        sheet.update(values=[LEADERBOARD_HEADERS], range_name='A1', value_input_option='RAW')
+    st.session_state.headers_checked = True
+
+
+def flush_pending_entries(sheet):
+    """Append this session's unsaved entries to the sheet.
+
+    Appending (instead of rewriting the whole sheet from a session's cache)
+    keeps concurrent sessions from overwriting each other and lets the
+    compaction job delete archived rows while games are in progress.
+    """
+    pending = st.session_state.pending_entries
+    if sheet is None or not pending:
+        return
+    
+    if append_leaderboard_entries(sheet, pending):
+        st.session_state.pending_entries = []
+
+
+def append_leaderboard_entries(sheet, entries):
+    """Append entries to the sheet in one call and fold them into the summary"""
+    breaker = get_circuit_breakers()["sheets"]
+    if not breaker.allow():
+        return False  # Entries stay pending and are retried on the next save
+    
+    try:
+        ensure_leaderboard_headers(sheet)
+        sheet.append_rows([entry_to_row(entry) for entry in entries],
+                          value_input_option='RAW')
+        breaker.record_success()
+    except Exception as e:
+        breaker.record_failure()
+        print(f"Error appending leaderboard entries: {str(e)}")
+        return False
+    
+    update_leaderboard_summary(sheet, entries)
+    return True
+
+
+def update_leaderboard_summary(sheet, entries):
+    """Fold new entries into the summary as it is on the sheet right now.
+
+    Writers on this host take turns through a shared lock, and each one
+    merges into a fresh read of the worksheet rather than its session's
+    copy, so concurrent game overs do not drop each other's entries.
+    """
+    state = get_shared_state()
+    owner = new_submission_id()
+    deadline = time.time() + SUMMARY_LOCK_WAIT
+    while not state.try_lock("summary-write", owner, SUMMARY_LOCK_WAIT * 2):
+        if time.time() >= deadline:
+            break  # Holder is stuck; merge anyway rather than lose the entries
+        time.sleep(0.1)
+    
+    try:
+        summary = read_leaderboard_summary(sheet)
+        save_leaderboard_summary(sheet, merge_into_summary(summary, entries))
+    except Exception as e:
+        print(f"Error updating leaderboard summary: {str(e)}")
+    finally:
+        state.unlock("summary-write", owner)
+
+
+def get_summary_sheet(sheet):
+    """Return the small 'Top Scores' worksheet, creating it on first use"""
     if sheet is None:
+        return None
+    
+    try:
+        return get_sheets_pool().worksheet(SUMMARY_WORKSHEET)
+    except Exception as e:
+        print(f"Error opening summary sheet: {str(e)}")
+        return None
+
+
+def save_leaderboard_summary(sheet, summary):
+    """Write the top-N summary to its worksheet and the local cache"""
+    
+    st.session_state.leaderboard_summary = summary
+    st.session_state.last_summary_load = datetime.now()
+    # Other sessions and processes see the new top scores without a sheet read
+    get_shared_state().set("summary", summary)
+    
+    summary_sheet = get_summary_sheet(sheet)
+    if summary_sheet is None:
         return
     
     try:
-        # Prepare all data at once
-        headers = ["Name", "Score", "Topic", "Date", "Time", 
-                  "Questions_Answered", "Game_Length"]
-        
-        # Sort entries
-        sorted_entries = sorted(
-            leaderboard.values(),
-            key=lambda x: (x["date"], x["time"], -x["score"]),
-            reverse=True
-        )
-        
-        # Create all rows at once
-        rows = [headers] + [
-            [
-                entry["name"],
-                entry["score"],
-                entry["topic"],
-                entry["date"],
-                entry["time"],
-                entry["questions_answered"],
-                entry["game_length"]
-            ]
-            for entry in sorted_entries
-        ]
-        
-        # Single batch update operation - FIXED order of arguments
-        sheet.update(values=rows, range_name='A1', value_input_option='RAW')
-        
+        # Overwrite in place, then clear only leftover rows below, so readers
+        # never see an empty worksheet between two calls
+        rows = summary_to_rows(summary)
+        # Ten rows per topic outgrow the worksheet as topics are added;
+        # updates never add rows on their own
+        if len(rows) > summary_sheet.row_count:
+            summary_sheet.resize(rows=len(rows))
+        summary_sheet.update(values=rows, range_name='A1', value_input_option='RAW')
+        if len(rows) < summary_sheet.row_count:
+            summary_sheet.batch_clear([f"{len(rows) + 1}:{summary_sheet.row_count}"])
     except Exception as e:
-        print(f"Error saving leaderboard: {str(e)}")
-
-def get_topic_rankings(leaderboard, topic):
-    """Get rankings for a specific topic, sorted by score and date"""
-    topic_scores = [
-        (entry["name"], entry["score"], entry["date"], entry["time"])
-        for entry in leaderboard.values()
-        if entry["topic"].lower() == topic.lower()
-    ]
-    # Sort by score (descending) and then by date/time (newest first)
-    return sorted(
-        topic_scores,
-        key=lambda x: (-x[1], x[2], x[3]),
-        reverse=False
+        print(f"Error saving leaderboard summary: {str(e)}")
+
+
+def load_leaderboard_summary(sheet, force_refresh=False):
+    """Load only the top-N rows the UI displays.
+
+    Reads the bounded 'Top Scores' worksheet, so the payload does not grow
+    with the number of games played. The full sheet is scanned only when
+    the summary has to be rebuilt (first run or missing worksheet). Like
+    the leaderboard, it is a shared snapshot refreshed by one process at a time.
+    """
+    summary, _ = load_shared_snapshot(
+        "summary",
+        snapshot_max_age(sheet, force_refresh),
+        lambda: read_leaderboard_summary(sheet),
+        lambda summary: summary,
+        "leaderboard summary"
     )
+    if summary is None:
+        summary = st.session_state.leaderboard_summary
+    
+    st.session_state.leaderboard_summary = summary
+    st.session_state.last_summary_load = datetime.now()
+    return summary
+
+
+def read_leaderboard_summary(sheet):
+    """Read the summary worksheet, rebuilding it from a full scan if it is empty"""
+    records = read_sheet_records(sheet, summary=True)
+    if records:
+        return records_to_summary(records)
+    
+    # Cache rebuild: full scan once, then publish the summary for everyone
+    leaderboard = load_leaderboard(sheet, force_refresh=True)
+    if not leaderboard:
+        return None
+    summary = build_summary(leaderboard.values())
+    save_leaderboard_summary(sheet, summary)
+    return summary
+
+
+SCORE_DISTRIBUTION_MAX_AGE = 30 * 60  # seconds before a rebuild picks up other processes' games
+
+
+@st.cache_resource(show_spinner=False)
+def get_score_distribution_holder():
+    """Process-wide slot for the cached score distribution"""
+    return {"distribution": None}
+
+
+def get_score_distribution(leaderboard):
+    """Cached score distribution, rebuilt from the columnar leaderboard when stale"""
+    holder = get_score_distribution_holder()
+    distribution = holder["distribution"]
+    if distribution is None or distribution.age() > SCORE_DISTRIBUTION_MAX_AGE:
+        distribution = ScoreDistribution.from_leaderboard(leaderboard)
+        # An empty leaderboard means no snapshot yet (e.g. Sheets was down):
+        # use it for this page only and build again next time
+        if len(leaderboard):
+            holder["distribution"] = distribution
+    return distribution
+
+
+def record_score_distribution(score, topic):
+    """Fold a new game into the cached distribution (no-op until it is built)"""
+    distribution = get_score_distribution_holder()["distribution"]
+    if distribution is not None:
+        distribution.add(score, topic)
+
+
+def display_score_distribution(distribution, score, topic):
+    """Percentile rank, histogram and per-topic stats for the game-over screen"""
+    overall_percentile = distribution.percentile_rank(score)
+    topic_percentile = distribution.percentile_rank(score, topic)
+    topic_stats = distribution.stats(topic)
+    
+    st.markdown("### 📈 How You Compare")
+    if overall_percentile is not None:
+        st.markdown(f"You scored higher than **{overall_percentile:.1f}%** of all games")
+    if topic_percentile is not None:
+        st.markdown(f"and higher than **{topic_percentile:.1f}%** of {topic} games.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        # Numeric bin edges keep the x axis in score order
+        edges, counts = distribution.histogram(topic)
+        st.bar_chart({"Games": dict(zip(edges.tolist(), counts.tolist()))})
+    with col2:
+        if topic_stats:
+            st.markdown(
+                f"""**{topic} scores** ({topic_stats['games']} games)  
+                Average: {topic_stats['mean']:.0f} · Median: {topic_stats['median']}  
+                90th percentile: {topic_stats['p90']} · Best: {topic_stats['best']}  
+                Std. deviation: {topic_stats['std']:.0f}"""
+            )
 
 
 def display_game_over(player_name, score, topic, questions_answered, game_length):
     """Enhanced game over display with updated rankings"""
     try:
         sheet = authenticate_google_sheets()
-        if sheet:
-            # Add these lines right here, before update_leaderboard_entry
-            from datetime import datetime
-            current_time = datetime.now()
-            current_date = current_time.strftime("%b %d, %Y")
-            current_time_str = current_time.strftime("%I:%M %p")
-            
-            # Update leaderboard with force_write=True to save to sheet
-            update_leaderboard_entry(
-                sheet, player_name, score, topic, 
-                questions_answered, game_length,
-                force_write=True
-            )
+        # Add these lines right here, before update_leaderboard_entry
+        current_time = datetime.now()
+        current_date = current_time.strftime("%b %d, %Y")
+        current_time_str = current_time.strftime("%I:%M %p")
             
-            # Use cached data for display
-            leaderboard = st.session_state.leaderboard_cache
-            if leaderboard is None:
-                leaderboard = load_leaderboard(sheet)    
+        # Save to sheet (room games are submitted as one batch per room); while
+        # Sheets is unreachable the entry stays pending and ranks use the last snapshot
+        save_game_result(sheet)
             
+        # Ranks come from the shared snapshot (a version check, not a sheet
+        # read) plus this session's own games, so game over does not
+        # rescan the full history
+        leaderboard = load_leaderboard(sheet)
+        if not isinstance(leaderboard, ColumnarLeaderboard):
+            leaderboard = ColumnarLeaderboard.from_entries(leaderboard.values())
             
-
+        # Top 5 lists come from the summary refreshed by the save above
+        summary = load_leaderboard_summary(sheet) or build_summary(leaderboard.values())
         
-            # Calculate rankings
-            sorted_entries = sorted(
-                leaderboard.values(),
-                key=lambda x: (-x["score"], x["date"], x["time"])
-            )
-            
-            overall_rank = next(
-                (i + 1 for i, entry in enumerate(sorted_entries)
-                if entry["name"] == player_name and 
-                entry["score"] == score and
-                entry["topic"] == topic),
-                None
-            )
-            
-            topic_rankings = get_topic_rankings(leaderboard, topic)
-            topic_rank = next(
-                (i + 1 for i, (name, s, _, _) in enumerate(topic_rankings)
-                if name == player_name and s == score),
-                None
-            )
+        # Rank this game against the snapshot plus this session's newer games
+        # (directly on the columns, no full sort needed)
+        entry = next(
+            (e for e in reversed(st.session_state.session_entries)
+             if e["name"] == player_name and e["score"] == score and e["topic"] == topic),
+            {"name": player_name, "score": score, "topic": topic,
+             "date": current_date, "time": current_time_str}
+        )
+        overall_rank = rank_with_entries(leaderboard, entry, st.session_state.session_entries)
+        topic_rank = rank_with_entries(
+            leaderboard, entry, st.session_state.session_entries, topic=topic
+        )
             
-            # Display results in columns
-            col1, col2 = st.columns(2)
+        # Display results in columns
+        col1, col2 = st.columns(2)
             
-            with col1:
-                st.markdown(f"""
-                <div class="game-over-section">
-                    <div class="game-over-title">🎉 Game Over!</div>
-                    <div class="game-over-stats">
-                        Final Score: {score}<br>
-                        Player: {player_name}<br>
-                        Topic: {topic}<br>
-                        Questions: {questions_answered}/{game_length}<br>
-                        Overall Rank: #{overall_rank}<br>
-                        Topic Rank: #{topic_rank}<br>
-                        Date: {current_date}<br>
-                        Time: {current_time_str}
-                    </div>
+        with col1:
+            st.markdown(f"""
+            <div class="game-over-section">
+                <div class="game-over-title">🎉 Game Over!</div>
+                <div class="game-over-stats">
+                    Final Score: {score}<br>
+                    Player: {player_name}<br>
+                    Topic: {topic}<br>
+                    Questions: {questions_answered}/{game_length}<br>
+                    Overall Rank: #{overall_rank}<br>
+                    Topic Rank: #{topic_rank}<br>
+                    Date: {current_date}<br>
+                    Time: {current_time_str}
                 </div>
-                """, unsafe_allow_html=True)
+            </div>
+            """, unsafe_allow_html=True)
                 
-                st.markdown("### 🏆 Overall Top 5")
-                for i, entry in enumerate(sorted_entries[:5], 1):
-                    if (entry["name"] == player_name and 
-                        entry["score"] == score and 
-                        entry["topic"] == topic):
-                        st.markdown(
-                            f"""**{i}. {entry['name']} ({entry['topic']}): """
-                            f"""{entry['score']} points** ← You"""
-                            f""" ({entry['date']} {entry['time']})"""
-                        )
-                    else:
-                        st.markdown(
-                            f"""{i}. {entry['name']} ({entry['topic']}): """
-                            f"""{entry['score']} points"""
-                            f""" ({entry['date']} {entry['time']})"""
-                        )
+            st.markdown("### 🏆 Overall Top 5")
+            for i, entry in enumerate(summary["overall"][:5], 1):
+                if (entry["name"] == player_name and 
+                    entry["score"] == score and 
+                    entry["topic"] == topic):
+                    st.markdown(
+                        f"""**{i}. {entry['name']} ({entry['topic']}): """
+                        f"""{entry['score']} points** ← You"""
+                        f""" ({entry['date']} {entry['time']})"""
+                    )
+                else:
+                    st.markdown(
+                        f"""{i}. {entry['name']} ({entry['topic']}): """
+                        f"""{entry['score']} points"""
+                        f""" ({entry['date']} {entry['time']})"""
+                    )
             
-            with col2:
-                st.markdown(f"### 🎯 Top 5 for {topic}")
-                for i, (name, score, date, time) in enumerate(topic_rankings[:5], 1):
-                    if name == player_name:
-                        st.markdown(
-                            f"""**{i}. {name}: {score} points** ← You"""
-                            f""" ({date} {time})"""
-                        )
-                    else:
-                        st.markdown(
-                            f"""{i}. {name}: {score} points"""
-                            f""" ({date} {time})"""
-                        )
-                
-                if topic_rank and topic_rank <= 5:
-                    st.success(
-                        f"🌟 Congratulations! "
-                        f"You are #{topic_rank} on the {topic} leaderboard!"
+        with col2:
+            st.markdown(f"### 🎯 Top 5 for {topic}")
+            topic_entries = summary["topics"].get(topic_scope(topic), [])
+            for i, entry in enumerate(topic_entries[:5], 1):
+                name, date, time = entry["name"], entry["date"], entry["time"]
+                if name == player_name:
+                    st.markdown(
+                        f"""**{i}. {name}: {entry['score']} points** ← You"""
+                        f""" ({date} {time})"""
+                    )
+                else:
+                    st.markdown(
+                        f"""{i}. {name}: {entry['score']} points"""
+                        f""" ({date} {time})"""
                     )
+                
+            if topic_rank and topic_rank <= 5:
+                st.success(
+                    f"🌟 Congratulations! "
+                    f"You are #{topic_rank} on the {topic} leaderboard!"
+                )
+            
+        display_score_distribution(get_score_distribution(leaderboard), score, topic)
             
     except Exception as e:
         st.error(f"Unable to update leaderboard: {str(e)}")
@@ -548,19 +876,14 @@ def display_leaderboards():
     """Display both overall and topic-specific leaderboards with timestamps"""
     st.sidebar.markdown("---")
     
-    # Get fresh data once for both leaderboards
+    # Only the top-N summary is needed here, never the full history
     sheet = authenticate_google_sheets()
-    current_leaderboard = load_leaderboard(sheet) if sheet else {}
+    summary = load_leaderboard_summary(sheet)  # last good snapshot if Sheets is down
     
     # Overall Leaderboard
     with st.sidebar.expander("📊 Overall Leaderboard", expanded=False):
-        if current_leaderboard:
-            sorted_entries = sorted(
-                current_leaderboard.values(),
-                key=lambda x: (-x["score"], x["date"], x["time"])
-            )
-            
-            for i, entry in enumerate(sorted_entries[:10], 1):
+        if summary:
+            for i, entry in enumerate(summary["overall"][:10], 1):
                 st.write(
                     f"""{i}. {entry['name']} ({entry['topic']}): """
                     f"""{entry['score']} points"""
@@ -575,13 +898,13 @@ def display_leaderboards():
             f"🎯 {st.session_state.topic} Leaderboard", 
             expanded=False
         ):
-            if current_leaderboard:
-                topic_rankings = get_topic_rankings(current_leaderboard, st.session_state.topic)
-                if topic_rankings:
-                    for i, (name, score, date, time) in enumerate(topic_rankings[:10], 1):
+            if summary:
+                topic_entries = summary["topics"].get(topic_scope(st.session_state.topic), [])
+                if topic_entries:
+                    for i, entry in enumerate(topic_entries[:10], 1):
                         st.write(
-                            f"{i}. {name}: {score} points "
-                            f"- {date} {time}"
+                            f"{i}. {entry['name']}: {entry['score']} points "
+                            f"- {entry['date']} {entry['time']}"
                         )
                 else:
                     st.info("No scores yet for this topic!")
@@ -589,96 +912,183 @@ def display_leaderboards():
                 st.info("Topic leaderboard temporarily unavailable")
 
 
-def generate_trivia_question(topic):
-    """Generate a unique trivia question based on the topic with improved validation"""
-    
-    prompt = f"""Create a concise but challenging trivia question about {topic}.
-
-    Requirements:
-    1. Question must be unique and specific to {topic}
-    2. Length: Question should be 2-4 sentences maximum
-    3. All answer choices must be:
-       - Distinctly different from each other
-       - Similar in length and complexity, and detailed
-       - Plausible but with only one and only one clearly correct answer
-    4. Fact check must be concise (max 3 sentences) and definitively prove the correct answer
-    
-    CRITICAL: Each answer choice must be meaningfully different from the others.
+@st.cache_resource(show_spinner=False)
+def get_question_bank():
+    """Pre-generated questions (see pregenerate_questions.py), loaded once per process"""
+    with profile_step("question bank"):
+        return load_question_bank()
+
+
+def take_banked_question(topic, seen):
+    """Return a pre-generated question for the topic not yet in `seen`, if any"""
+    questions = get_question_bank().get(topic_scope(topic), [])
+    if not questions:
+        return None
     
-    Format:
-    QUESTION: [Concise question about {topic}]
-    A) [Distinct answer]
-    B) [Distinct answer]
-    C) [Distinct answer]
-    D) [Distinct answer]
-    CORRECT: [A, B, C, or D]
-    FACT CHECK: [Brief verification of correct answer]
+    # Start at a random offset so concurrent players spread across the bank
+    offset = randrange(len(questions))
+    for i in range(len(questions)):
+        banked = questions[(offset + i) % len(questions)]
+        key = question_key(topic, banked["question"])
+        if key in seen:
+            continue
+        # Skip questions the verifier has already rejected
+        if VERIFY_ANSWERS and (get_question_verifier().cached(key) or {}).get("status") == "invalid":
+            continue
+        seen.add(key)
+        return prepare_question(key, {
+            "question": banked["question"],
+            "choices": list(banked["choices"]),
+            "correct": banked["correct"],
+            "fact_check": banked["fact_check"],
+            "source": "bank"
+        })
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_token_accountant():
+    """Process-wide token usage and max_tokens tuning for question generation"""
+    return TokenAccountant()
+
+
+@st.cache_resource(show_spinner=False)
+def get_question_hedger():
+    """Process-wide hedging for question generation (shares the latency history)"""
+    return HedgedRequester()
+
+
+@st.cache_resource(show_spinner=False)
+def get_question_verifier():
+    """Background answer-key verifier with a process-wide verdict cache"""
+    return QuestionVerifier(get_openai_client)
+
+
+def prepare_question(key, question):
+    """Stamp a question for play and start its background fact check"""
+    question = dict(question, key=key, start_time=time.time())
+    if VERIFY_ANSWERS and get_circuit_breakers()["openai"].state == "closed":
+        get_question_verifier().submit(key, question)
+    return question
+
+
+def remember_question(topic, question):
+    """Keep recently generated questions per topic to serve during outages.
+
+    Only a copy of the parsed fields is kept: the memory backend stores the
+    object itself, and the live question gets timing fields during play.
+    """
+    get_shared_state().append(
+        f"questions:{topic_scope(topic)}",
+        dict({field: question[field] for field in QUESTION_FIELDS},
+             key=question["key"], choices=list(question["choices"])),
+        RECENT_QUESTIONS_PER_TOPIC
+    )
+
+
+def take_fallback_question(topic, seen):
+    """A recently generated question for the topic this player has not seen"""
+    for question in reversed(get_shared_state().items(f"questions:{topic_scope(topic)}")):
+        if question["key"] not in seen:
+            seen.add(question["key"])
+            # A fresh play copy: the clock starts now, with no earlier render or overheads
+            parsed = {field: question[field] for field in QUESTION_FIELDS}
+            parsed["choices"] = list(parsed["choices"])
+            return prepare_question(question["key"], dict(parsed, source="fallback"))
+    return None
+
+
+def wait_for_openai_slot():
+    """Take a token from the shared OpenAI rate limit, waiting a few seconds at most"""
+    if OPENAI_REQUESTS_PER_MINUTE <= 0:
+        return True
+    deadline = time.time() + OPENAI_SLOT_WAIT
+    while True:
+        wait = get_shared_state().take_token(
+            "openai", OPENAI_REQUESTS_PER_MINUTE / 60, max(1, OPENAI_REQUESTS_PER_MINUTE // 6)
+        )
+        if wait == 0:
+            return True
+        if time.time() + wait > deadline:
+            return False
+        time.sleep(wait)
+
+
+def generate_trivia_question(topic, seen=None, report_errors=True):
+    """Generate a unique trivia question based on the topic with improved validation.
+
+    `seen` holds the keys of questions already asked (the session's
+    question cache by default). Background callers such as room question
+    generation pass their own set and report_errors=False.
+    """
+    started = time.time()
+    if seen is None:
+        seen = st.session_state.question_cache
     
-    The question key must be unique to prevent duplicates."""
+    question = generate_question_from_sources(topic, seen, report_errors)
+    if question is not None:
+        # Kept on the question so per-answer telemetry can report it
+        question["generation_seconds"] = time.time() - started
+    return question
+
 
+def generate_question_from_sources(topic, seen, report_errors):
+    """Question bank first, then the model, then recent questions during outages"""
+    # Pre-generated questions skip the model round trip entirely
+    banked = take_banked_question(topic, seen)
+    if banked:
+        return banked
+    
+    breaker = get_circuit_breakers()["openai"]
     max_attempts = 3
     for attempt in range(max_attempts):
+        if not wait_for_openai_slot() or not breaker.allow():
+            # OpenAI is failing or rate limited: serve a recent question instead of waiting
+            fallback = take_fallback_question(topic, seen)
+            if fallback is None and report_errors:
+                st.error("Question service is temporarily unavailable. Please try again shortly.")
+            return fallback
+        
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",  # Using full GPT-4 instead of turbo
-                messages=[
-                    {"role": "system", "content": f"You are a {topic} expert creating concise, accurate trivia questions. Focus on interesting but verifiable facts."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.9,  # Increased for more variety
-                max_tokens=650,
-                presence_penalty=0.6,  # Encourage more diverse responses
-                frequency_penalty=0.6  # Discourage repetitive answers
+            # A slow call is hedged with a second one; the first valid response wins
+            client = get_openai_client()
+            parsed = get_question_hedger().request(
+                lambda: request_question(client, topic, get_token_accountant()),
+                parse_trivia_response
             )
+            breaker.record_success()
             
-            content = response.choices[0].message.content.strip().split("\n")
-            question = None
-            choices = []
-            correct_answer = None
-            fact_check = None
-            
-            for line in content:
-                line = line.strip()
-                if line.startswith("QUESTION:"):
-                    question = line.replace("QUESTION:", "").strip()
-                elif line.startswith(("A)", "B)", "C)", "D)")):
-                    choices.append(line)
-                elif line.startswith("CORRECT:"):
-                    correct_answer = line.replace("CORRECT:", "").strip()
-                elif line.startswith("FACT CHECK:"):
-                    fact_check = line.replace("FACT CHECK:", "").strip()
-            
-            # Validate response format
-            if not all([question, len(choices) == 4, correct_answer, fact_check]):
+            # Validate response format and distinct answer choices
+            if parsed is None:
                 continue
                 
             # Create a unique key for the question
-            question_key = f"{topic}:{question}"
+            key = question_key(topic, parsed["question"])
             
             # Check if question is unique
-            if question_key in st.session_state.question_cache:
-                continue
-                
-            # Validate answer choices are distinct
-            answer_texts = [c.split(")", 1)[1].strip().lower() for c in choices]
-            if len(set(answer_texts)) != 4:
+            if key in seen:
                 continue
                 
             # Add to cache
-            st.session_state.question_cache.add(question_key)
+            seen.add(key)
             
-            return {
-                "question": question,
-                "choices": choices,
-                "correct": correct_answer,
-                "fact_check": fact_check,
-                "start_time": time.time()
-            }
+            question = prepare_question(key, dict(parsed, source="model"))
+            remember_question(topic, question)
+            return question
         except Exception as e:
+            breaker.record_failure()
             if attempt == max_attempts - 1:
-                st.error(f"Error generating question: {str(e)}")
+                fallback = take_fallback_question(topic, seen)
+                if fallback:
+                    return fallback
+                if report_errors:
+                    st.error(f"Error generating question: {str(e)}")
+                else:
+                    print(f"Error generating question: {str(e)}")
                 return None
-            time.sleep(1)
+            # Only back off while the circuit is closed; an open one fails fast above
+            if breaker.state == "closed":
+                time.sleep(1)
             continue
     
     return None  # If all attempts fail
@@ -691,13 +1101,46 @@ def calculate_score(time_remaining):
     score = int((time_remaining / max_time) * 200)
     return min(200, max(0, score))
 
+def question_elapsed(question, now):
+    """Seconds the player has had the question on screen.
+
+    The clock starts when the question finished rendering, not when it
+    was generated, so generation and rerun latency are not charged to
+    the player.
+    """
+    return now - question.get("rendered_at", question["start_time"])
+
+
 def check_answer(selected_answer):
     """Check if the answer is correct and calculate score"""
-    current_time = time.time()
-    time_elapsed = current_time - st.session_state.current_question["start_time"]
+    question = st.session_state.current_question
+    
+    # Time the click by when its rerun reached the server, not when we got here
+    received_at = st.session_state.get("run_started_at") or time.time()
+    time_elapsed = question_elapsed(question, received_at)
     time_remaining = max(0, 65 - time_elapsed)
     
-    correct = selected_answer == st.session_state.current_question["correct"]
+    # Overhead we no longer charge to the player, recorded with the answer event
+    # as a latency signal
+    question["render_overhead"] = question.get("rendered_at", question["start_time"]) - question["start_time"]
+    question["answer_overhead"] = time.time() - received_at
+    if PROFILE_STARTUP:
+        print(f"[latency] render overhead {question['render_overhead'] * 1000:.0f} ms, "
+              f"answer overhead {question['answer_overhead'] * 1000:.0f} ms")
+    
+    # The background verdict is normally ready by the time the player answers
+    verdict = None
+    if VERIFY_ANSWERS and question.get("key"):
+        verdict = get_question_verifier().result(question["key"], timeout=VERIFY_WAIT_SECONDS)
+    verifier_note = ""
+    if verdict and verdict["status"] == "corrected":
+        question["correct"] = verdict["correct"]
+        verifier_note = f"\n\n🔎 Answer key corrected by our fact-checker: {verdict['reason']}"
+    flagged = bool(verdict) and verdict["status"] == "invalid"
+    if flagged:
+        verifier_note = f"\n\n🔎 Our fact-checker flagged this question, so every answer counts: {verdict['reason']}"
+    
+    correct = flagged or selected_answer == st.session_state.current_question["correct"]
     points = calculate_score(time_remaining) if correct else 0
     
     if correct:
@@ -705,20 +1148,264 @@ def check_answer(selected_answer):
         st.session_state.feedback = (
             f"""✨ Correct! You earned {points} points!
             
-            {st.session_state.current_question['fact_check']}""",
+            {st.session_state.current_question['fact_check']}{verifier_note}""",
             "success"
         )
     else:
         st.session_state.feedback = (
             f"""❌ Wrong! The correct answer was {st.session_state.current_question['correct']}.
             
-            {st.session_state.current_question['fact_check']}""",
+            {st.session_state.current_question['fact_check']}{verifier_note}""",
             "error"
         )
     
     st.session_state.answer_selected = True
+    get_player_stats().record_answer(st.session_state.player_name, correct, time_elapsed)
+    record_answer_event(question, selected_answer, correct, False, time_elapsed, points)
+    
+    room = get_current_room()
+    if room is not None:
+        room.record_answer(st.session_state.session_id, st.session_state.questions_asked,
+                           selected_answer, points)
     return time_remaining
 
+@st.cache_resource(show_spinner=False)
+def get_answer_log():
+    """Per-answer event stream, buffered in memory and flushed in batches"""
+    return AnswerEventLog()
+
+
+def record_answer_event(question, choice, correct, timed_out, seconds, points):
+    """Buffer one answer (or timeout) for the telemetry stream; no I/O here"""
+    get_answer_log().record(
+        player=st.session_state.player_name,
+        topic=st.session_state.topic,
+        question_key=question.get("key"),
+        source="room" if st.session_state.get("room_code") else question.get("source"),
+        question_index=st.session_state.questions_asked,
+        choice=choice,
+        correct=correct,
+        timed_out=timed_out,
+        answer_seconds=seconds,
+        generation_seconds=question.get("generation_seconds"),
+        points=points,
+        render_overhead=question.get("render_overhead"),
+        answer_overhead=question.get("answer_overhead")
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_player_stats():
+    """Incrementally maintained per-player statistics, shared by all sessions and processes"""
+    return PlayerStatsStore(open_shared_state(PLAYER_STATS_URL))
+
+
+def display_player_profile():
+    """Sidebar profile panel: a single O(1) lookup, no leaderboard scan"""
+    stats = get_player_stats().get(st.session_state.player_name)
+    if not stats:
+        return
+    
+    with st.sidebar.expander("📊 Player Statistics", expanded=False):
+        st.write(f"Games played: {stats['games']}")
+        st.write(f"Average score: {stats['average_score']:.0f} · Best: {stats['best_score']}")
+        st.write(f"Accuracy: {stats['accuracy']:.0%}")
+        st.write(f"Average answer time: {stats['average_answer_time']:.1f}s")
+        st.write(f"Streak: {stats['current_streak']} (best {stats['best_streak']})")
+        for topic, topic_stats in sorted(stats["topics"].items(),
+                                         key=lambda x: -x[1]["games"])[:5]:
+            st.write(
+                f"🎯 {topic}: {topic_stats['games']} games, "
+                f"avg {topic_stats['average_score']:.0f}, best {topic_stats['best_score']}"
+            )
+
+
+@st.cache_resource(show_spinner=False)
+def get_room_registry():
+    """Multiplayer rooms live in-process and are shared by all sessions of this
+    process only (several processes need sticky routing, see README)"""
+    return RoomRegistry()
+
+
+def get_current_room():
+    """The room this session has joined, or None"""
+    if not st.session_state.room_code:
+        return None
+    return get_room_registry().get(st.session_state.room_code)
+
+
+def submit_room_results(sheet, room):
+    """Submit every room player's result to the leaderboard as one batch"""
+    current_time = datetime.now()
+    date_str = current_time.strftime("%b %d, %Y")
+    time_str = current_time.strftime("%I:%M %p")
+    
+    entries = []
+    for member_id, name, score, answered, _ in room.results():
+        submission_id = f"room-{room.code}-{member_id}"
+        if member_id not in room.submitted_players or submission_id in st.session_state.submitted_ids:
+            continue
+        entries.append({
+            "name": name,
+            "score": score,
+            "topic": room.topic,
+            "date": date_str,
+            "time": time_str,
+            "questions_answered": answered,
+            "game_length": room.game_length,
+            # One id per room and member, so nobody is submitted twice
+            "submission_id": submission_id
+        })
+    for entry in entries:
+        get_player_stats().record_game(entry["name"], entry["topic"], entry["score"])
+        record_score_distribution(entry["score"], entry["topic"])
+    st.session_state.submitted_ids.update(entry["submission_id"] for entry in entries)
+    st.session_state.session_entries.extend(entries)
+    # Queued like single-player results, so a failed write is retried on the next save
+    st.session_state.pending_entries.extend(entries)
+    if sheet:
+        flush_pending_entries(sheet)
+
+
+def save_game_result(sheet, end_room=False):
+    """Record this session's game, individually or as part of its room's batch"""
+    room = get_current_room()
+    player = st.session_state.player_name
+    member_id = st.session_state.session_id
+    if room is not None and member_id in room.players:
+        room.finish(member_id)
+        # The batch goes out once everyone is done, or when the host ends the game
+        if (room.all_finished() or (end_room and member_id == room.host_id)) and room.claim_submission():
+            submit_room_results(sheet, room)
+        # Until the batch is claimed the room is still open: this result goes
+        # out with it. Only players who missed the batch are saved on their own.
+        if not room.submission_claimed() or member_id in room.submitted_players:
+            return
+    
+    if st.session_state.questions_asked > 0:
+        update_leaderboard_entry(
+            sheet,
+            player,
+            st.session_state.total_score,
+            st.session_state.topic,
+            st.session_state.questions_asked,
+            st.session_state.game_length,
+            force_write=True  # Write to sheet
+        )
+
+
+def display_room_controls():
+    """Sidebar controls to host or join a multiplayer room"""
+    registry = get_room_registry()
+    room = get_current_room()
+    player = st.session_state.player_name.strip()
+    
+    with st.sidebar.expander("👥 Multiplayer Room", expanded=room is not None):
+        if room is None:
+            if st.button("Host Room", use_container_width=True,
+                         disabled=st.session_state.game_active):
+                if player and st.session_state.topic.strip():
+                    room = registry.create(st.session_state.session_id, player,
+                                           st.session_state.topic, st.session_state.game_length)
+                    st.session_state.room_code = room.code
+                    st.rerun()
+                else:
+                    st.error("Please enter both player name and topic to host!")
+            
+            code = st.text_input("Room Code:", key="room_code_input")
+            if st.button("Join Room", use_container_width=True,
+                         disabled=st.session_state.game_active):
+                joined = registry.get(code)
+                if not player:
+                    st.error("Please enter a player name")
+                elif joined is None:
+                    st.error("Room not found")
+                elif joined.started:
+                    st.error("That room's game has already started")
+                elif not joined.join(st.session_state.session_id, player):
+                    st.error("That name is already taken in this room")
+                else:
+                    st.session_state.room_code = joined.code
+                    st.session_state.topic = joined.topic
+                    st.session_state.game_length = joined.game_length
+                    st.rerun()
+            return
+        
+        st.markdown(f"**Room {room.code}** · {room.topic} · {room.game_length} questions")
+        for name, score, answered, finished in room.standings():
+            status = "✅" if finished else f"{answered}/{room.game_length}"
+            st.write(f"{name}: {score} points ({status})")
+        
+        if st.session_state.session_id == room.host_id and not room.started:
+            if st.button("Start Room Game", use_container_width=True, type="primary"):
+                room.start(lambda topic, seen: generate_trivia_question(
+                    topic, seen, report_errors=False))
+                st.rerun()
+        
+        if st.button("Leave Room", use_container_width=True):
+            st.session_state.room_code = None
+            st.rerun()
+
+
+def sync_room_game():
+    """Start this session's game when its room starts; wait in the lobby until then"""
+    room = get_current_room()
+    if room is None:
+        return
+    
+    if room.started and not st.session_state.game_active and st.session_state.room_joined_game != room.code:
+        reset_game_state()
+        st.session_state.topic = room.topic
+        st.session_state.game_length = room.game_length
+        st.session_state.game_active = True
+        st.session_state.room_joined_game = room.code
+        st.rerun()
+    
+    if not room.started:
+        st.info(f"👥 Room {room.code}: waiting for {room.host} to start the game...")
+        # Wake up as soon as something happens in the room (or poll every 2s)
+        subscriber = room.subscribe()
+        try:
+            subscriber.get(timeout=2)
+        except queue.Empty:
+            pass
+        finally:
+            room.unsubscribe(subscriber)
+        st.rerun()
+
+
+def warm_up():
+    """Initialize the heavy clients before the first player needs them"""
+    try:
+        get_openai_client()
+        get_sheets_pool().worksheet()
+    except Exception as e:
+        print(f"Warm-up failed: {str(e)}")
+
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """Run warm_up() once per process in a background thread"""
+    thread = threading.Thread(target=warm_up, name="trivia-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def display_startup_profile():
+    """Show the cold-start profile collected when TRIVIA_PROFILE_STARTUP=1"""
+    profile = get_startup_profile()
+    profile.setdefault("first page render", time.perf_counter() - _IMPORT_START)
+    with st.sidebar.expander("⏱️ Startup Profile", expanded=False):
+        for name, seconds in sorted(profile.items(), key=lambda x: -x[1]):
+            st.write(f"{name}: {seconds * 1000:.1f} ms")
+        
+        hedging = get_question_hedger().snapshot()
+        if hedging["served_p99"] is not None:
+            st.write(f"question p99: {hedging['unhedged_p99']:.2f} s unhedged, "
+                     f"{hedging['served_p99']:.2f} s served "
+                     f"({hedging['hedge_rate']:.1%} hedged)")
+
+
 def reset_game_state():
     """Reset game state for a new game but preserve question cache"""
     st.session_state.questions_asked = 0
@@ -727,11 +1414,16 @@ def reset_game_state():
     st.session_state.answer_selected = False
     st.session_state.feedback = None
     st.session_state.game_active = False
-    st.session_state.leaderboard_cache = None
-    st.session_state.last_sheet_load = None
+    st.session_state.submission_id = new_submission_id()
     # Note: We do NOT clear question_cache here
     
 def main():
+    # Arrival time of this rerun, used to time answer clicks fairly
+    st.session_state.run_started_at = time.time()
+    
+    if WARMUP_ON_START:
+        start_warm_up()
+    
     # Add auto-refresh script
     st.markdown("""
         <script>
@@ -802,7 +1494,10 @@ def main():
         # Update Name button
         with col1:
             if st.button("Update Name", use_container_width=True):
-                if new_name.strip():
+                if st.session_state.room_code:
+                    # Room players are shown and submitted under the name they joined with
+                    st.sidebar.error("Leave the room to change your name")
+                elif new_name.strip():
                     if st.session_state.game_active and st.session_state.questions_asked > 0:
                         sheet = authenticate_google_sheets()
                         update_leaderboard_entry(
@@ -814,6 +1509,8 @@ def main():
                             st.session_state.game_length,
                             force_write=False  # Cache only
                         )
+                        # The rest of the game is recorded as its own submission
+                        st.session_state.submission_id = new_submission_id()
                     st.session_state.player_name = new_name.strip()
                     st.rerun()
                 else:
@@ -834,6 +1531,8 @@ def main():
                             st.session_state.game_length,
                             force_write=False  # Cache only
                         )
+                        # The rest of the game is recorded as its own submission
+                        st.session_state.submission_id = new_submission_id()
                     st.session_state.topic = new_topic.strip()
                     st.session_state.current_question = None
                     st.rerun()
@@ -855,32 +1554,16 @@ def main():
         # End Game button
         if st.sidebar.button("End Game", use_container_width=True, type="secondary"):
             sheet = authenticate_google_sheets()
-            if st.session_state.questions_asked > 0:
-                update_leaderboard_entry(
-                    sheet,
-                    st.session_state.player_name,
-                    st.session_state.total_score,
-                    st.session_state.topic,
-                    st.session_state.questions_asked,
-                    st.session_state.game_length,
-                    force_write=True  # Write to sheet
-                )
+            save_game_result(sheet, end_room=True)
+            st.session_state.room_code = None
             reset_game_state()
             st.rerun()
         
         # Start New Game button
         if st.sidebar.button("Start New Game", use_container_width=True, type="primary"):
             sheet = authenticate_google_sheets()
-            if st.session_state.questions_asked > 0:
-                update_leaderboard_entry(
-                    sheet,
-                    st.session_state.player_name,
-                    st.session_state.total_score,
-                    st.session_state.topic,
-                    st.session_state.questions_asked,
-                    st.session_state.game_length,
-                    force_write=True  # Write to sheet
-                )
+            save_game_result(sheet, end_room=True)
+            st.session_state.room_code = None
             reset_game_state()
             st.rerun()
 
@@ -888,7 +1571,10 @@ def main():
     if st.sidebar.button("Reset All", use_container_width=True, type="secondary"):
         st.session_state.question_cache.clear()  # Clear question cache
         reset_game_state()  # Reset other game state
+        st.session_state.room_code = None
         st.rerun()
+    
+    display_room_controls()
 
     # Player Stats
     if st.session_state.player_name:
@@ -903,19 +1589,32 @@ def main():
     
     # Display leaderboards
     display_leaderboards()
+    if st.session_state.player_name:
+        display_player_profile()
+    
+    # Room players start together and share one question set
+    sync_room_game()
 
     # Main Game Area
     if st.session_state.game_active and st.session_state.questions_asked < st.session_state.game_length:
         if not st.session_state.current_question:
             with st.spinner("Loading next question..."):
-                st.session_state.current_question = generate_trivia_question(st.session_state.topic)
+                room = get_current_room()
+                if room is not None and room.started:
+                    # Generated once for the room; each player gets their own copy and clock
+                    shared = room.wait_for_question(st.session_state.questions_asked, timeout=60)
+                    st.session_state.current_question = (
+                        dict(shared, start_time=time.time()) if shared else None
+                    )
+                else:
+                    st.session_state.current_question = generate_trivia_question(st.session_state.topic)
                 st.session_state.answer_selected = False
                 st.session_state.feedback = None
         
         if st.session_state.current_question:
             # Timer and current stats
             current_time = time.time()
-            time_elapsed = current_time - st.session_state.current_question["start_time"]
+            time_elapsed = question_elapsed(st.session_state.current_question, current_time)
             time_remaining = max(0, 65 - time_elapsed)
             
             timer_class = "timer-warning" if time_remaining < 10 else ""
@@ -935,6 +1634,12 @@ def main():
             # Auto-submit when time runs out
             if time_remaining <= 0 and not st.session_state.answer_selected:
                 st.session_state.answer_selected = True
+                get_player_stats().record_answer(st.session_state.player_name, False, 65)
+                record_answer_event(st.session_state.current_question, None, False, True, 65, 0)
+                room = get_current_room()
+                if room is not None:
+                    room.record_answer(st.session_state.session_id,
+                                       st.session_state.questions_asked, None, 0)
                 st.session_state.feedback = (
                     f"""⏰ Time's up! The correct answer was {st.session_state.current_question['correct']}.
                     
@@ -984,6 +1689,9 @@ def main():
                                    use_container_width=True):
                             time_remaining = check_answer(chr(65 + i))
             
+            # The question is now on screen: start the player's clock here
+            st.session_state.current_question.setdefault("rendered_at", time.time())
+            
             # Feedback area
             if st.session_state.feedback:
                 message, type_ = st.session_state.feedback
@@ -1054,15 +1762,14 @@ def main():
     """, unsafe_allow_html=True)
 
     # Footer image (if you want to keep it)
-    footer_img = load_and_resize_image("FooterImage.png", width=800)
+    footer_img = load_footer_image()
     if footer_img:
-        aspect_ratio = 0.02
-        new_height = int(800 * aspect_ratio)
-        from PIL import Image
-        resized_img = footer_img.resize((1200, new_height), Image.Resampling.LANCZOS)
-        st.image(resized_img, use_container_width=True)
+        st.image(footer_img, use_container_width=True)
 
     st.markdown("---")    
+    
+    if PROFILE_STARTUP:
+        display_startup_profile()
 #ICONS to use: 
 
 #🎮 Game Controls
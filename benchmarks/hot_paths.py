@@ -0,0 +1,199 @@
+"""Micro-benchmark regression suite for the hot pure-Python paths.
+
+Usage:
+    python benchmarks/hot_paths.py [--sizes 1000 10000 100000] [--threshold 1.3] [--accept]
+
+Times the code that runs on every rerun or game over against fixed,
+seeded synthetic data (so runs are comparable and fully offline):
+
+    parse_responses      parse_trivia_response() over 10k model responses,
+                         about a fifth of them malformed
+    load_leaderboard     ColumnarLeaderboard.from_records() (load_leaderboard)
+    game_over_ranks      overall and topic rank as display_game_over() computes them
+    summary_build        build_summary() over every row
+
+Each case is compared with its median over the last few stored runs
+from the same host (a median, so one lucky or noisy run does not move
+the baseline). A case slower than --threshold times that median is
+flagged and the script exits with status 1. Runs are appended to
+benchmarks/results.jsonl with the git revision; a run with regressions
+is only stored when --accept is given, and an accepted run starts a new
+baseline, for intended trade-offs.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from leaderboard_store import (  # noqa: E402
+    ColumnarLeaderboard, build_summary
+)
+from trivia_questions import parse_trivia_response  # noqa: E402
+from leaderboard_memory import synthetic_records, TOPICS  # noqa: E402
+
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.jsonl")
+RESPONSE_COUNT = 10_000
+REPEATS = 5
+MIN_RUN_SECONDS = 0.2  # per repeat, so fast cases are timed over many calls
+BASELINE_RUNS = 5      # stored runs the baseline median is taken over
+
+
+def synthetic_responses(count, seed=7):
+    """Model responses shaped like gpt-4o output, about 20% malformed"""
+    rng = random.Random(seed)
+    responses = []
+    for i in range(count):
+        choices = [f"{letter}) Answer {letter} for question {i} with some detail"
+                   for letter in "ABCD"]
+        lines = [f"QUESTION: Which of these facts about {rng.choice(TOPICS)} is true? "
+                 f"This is question number {i}."]
+        lines += choices
+        lines += [f"CORRECT: {rng.choice('ABCD')}",
+                  "FACT CHECK: A short verification of the correct answer."]
+        kind = rng.random()
+        if kind < 0.05:
+            lines.pop(2)  # only three choices
+        elif kind < 0.10:
+            lines[2] = lines[1]  # duplicate choice text
+        elif kind < 0.15:
+            lines = lines[:rng.randint(1, len(lines) - 1)]  # truncated by max_tokens
+        elif kind < 0.18:
+            lines = ["I'm sorry, I can't help with that."]
+        elif kind < 0.20:
+            lines = [""]
+        responses.append("\n".join(lines))
+    return responses
+
+
+def measure(function):
+    """Best per-call seconds over REPEATS runs of at least MIN_RUN_SECONDS"""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_RUN_SECONDS or calls >= 1_000_000:
+            break
+        calls *= 2 if elapsed <= 0 else max(2, int(MIN_RUN_SECONDS / elapsed) + 1)
+    best = elapsed / calls
+    for _ in range(REPEATS - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def leaderboard_cases(rows):
+    """(name, callable) pairs for one leaderboard size"""
+    records = synthetic_records(rows)
+    leaderboard = ColumnarLeaderboard.from_records(records)
+    player = records[len(records) // 2]
+
+    def game_over_ranks():
+        leaderboard.rank_of(player["Name"], player["Score"], topic=player["Topic"])
+        leaderboard.rank_of(player["Name"], player["Score"],
+                            indexes=leaderboard.topic_indexes(player["Topic"]))
+
+    return [
+        ("load_leaderboard", lambda: ColumnarLeaderboard.from_records(records)),
+        ("game_over_ranks", game_over_ranks),
+        ("summary_build", lambda: build_summary(leaderboard.values())),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def baseline_timings(path, host, runs=BASELINE_RUNS):
+    """(case -> median seconds, revisions) over the last `runs` stored runs
+    from the same host, going back no further than the latest accepted run"""
+    history = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    continue
+                if run.get("host") != host:
+                    continue
+                if run.get("accepted"):
+                    history = []
+                history.append(run)
+    history = history[-runs:]
+    timings = {}
+    for run in history:
+        for name, seconds in run["results"].items():
+            timings.setdefault(name, []).append(seconds)
+    return ({name: statistics.median(values) for name, values in timings.items()},
+            [run["revision"] for run in history])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--threshold", type=float, default=1.3,
+                        help="flag cases slower than this multiple of the baseline median")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true", help="compare without storing this run")
+    parser.add_argument("--accept", action="store_true",
+                        help="store this run even if it has regressions, as the new baseline")
+    args = parser.parse_args()
+
+    cases = [(f"parse_responses/{RESPONSE_COUNT}",
+              lambda responses=synthetic_responses(RESPONSE_COUNT):
+              [parse_trivia_response(r) for r in responses])]
+    for rows in args.sizes:
+        cases += [(f"{name}/{rows}", function) for name, function in leaderboard_cases(rows)]
+
+    host = f"{platform.node()} {platform.python_implementation()} {platform.python_version()}"
+    run = {"revision": git_revision(), "host": host,
+           "date": time.strftime("%Y-%m-%d %H:%M:%S"), "results": {}}
+    baseline, revisions = baseline_timings(args.results, host)
+    if revisions:
+        print(f"Comparing with the median of {len(revisions)} run(s): {', '.join(revisions)}")
+
+    regressions = []
+    for name, function in cases:
+        seconds = measure(function)
+        run["results"][name] = seconds
+        line = f"{name:32s} {seconds * 1000:10.3f} ms"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"  {ratio:5.2f}x"
+            if ratio > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.accept:
+        run["accepted"] = True
+    if not args.no_save and (args.accept or not regressions):
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, separators=(",", ":")) + "\n")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {args.threshold}x the baseline: "
+              + ", ".join(regressions))
+        if not args.no_save and not args.accept:
+            print("Run not stored; rerun with --accept to record it anyway")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Memory benchmark: dict-of-dicts leaderboard vs ColumnarLeaderboard.
+
+Usage:
+    python benchmarks/leaderboard_memory.py [--rows 100000]
+
+Builds the same synthetic leaderboard both ways from worksheet-style
+records and reports the memory each representation retains.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard_store import ColumnarLeaderboard, row_to_entry, new_submission_id  # noqa: E402
+
+TOPICS = ["World History", "Space", "Movies", "Science", "Music", "Sports",
+          "Geography", "Literature", "Art", "Technology"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def synthetic_records(rows, seed=42):
+    """Worksheet records shaped like sheet.get_all_records() output"""
+    rng = random.Random(seed)
+    players = [f"Player {i}" for i in range(max(1, rows // 20))]
+    return [{
+        "Name": rng.choice(players),
+        "Score": rng.randint(0, 2000),
+        "Topic": rng.choice(TOPICS),
+        "Date": f"{rng.choice(MONTHS)} {rng.randint(1, 28):02d}, {rng.choice([2024, 2025])}",
+        "Time": f"{rng.randint(1, 12):02d}:{rng.randint(0, 59):02d} {rng.choice(['AM', 'PM'])}",
+        "Questions_Answered": rng.choice([5, 10]),
+        "Game_Length": rng.choice([5, 10]),
+        "Submission_Id": new_submission_id()
+    } for _ in range(rows)]
+
+
+def retained_bytes(build, payload):
+    """Bytes still allocated after building a structure from a JSON payload.
+
+    Records are decoded inside the measurement, like get_all_records()
+    does, so each representation pays for exactly the strings it keeps.
+    """
+    gc.collect()
+    tracemalloc.start()
+    structure = build(json.loads(payload))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    payload = json.dumps(synthetic_records(args.rows))
+
+    dict_bytes = retained_bytes(
+        lambda records: {i: row_to_entry(row) for i, row in enumerate(records)},
+        payload
+    )
+    columnar_bytes = retained_bytes(ColumnarLeaderboard.from_records, payload)
+
+    print(f"Rows: {args.rows:,}")
+    print(f"dict-of-dicts:       {dict_bytes / 1e6:8.1f} MB ({dict_bytes / args.rows:6.0f} B/row)")
+    print(f"ColumnarLeaderboard: {columnar_bytes / 1e6:8.1f} MB ({columnar_bytes / args.rows:6.0f} B/row)")
+    print(f"Reduction:           {1 - columnar_bytes / dict_bytes:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Leaderboard compaction and archive queries.
+
+Usage:
+    python compact_leaderboard.py compact [--top-per-topic 25] [--recent-days 30]
+    python compact_leaderboard.py history "Player Name"
+
+Keeps the hot set (top scores per topic plus recent games) in the live
+Google Sheet and moves everything else into compressed JSONL files under
+leaderboard_archive/. Safe to run while games are being played.
+"""
+import argparse
+
+from leaderboard_store import (
+    SHEETS_SCOPE, LOCAL_KEY_FILE, LOCAL_SHEET_URL, ARCHIVE_DIR,
+    HOT_TOP_PER_TOPIC, HOT_RECENT_DAYS,
+    row_to_entry, compact_leaderboard, load_player_history
+)
+
+
+def open_sheet(key_file, sheet_url):
+    """Authenticate with a service account key file and open the leaderboard"""
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_name(key_file, SHEETS_SCOPE)
+    return gspread.authorize(creds).open_by_url(sheet_url).sheet1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact and query the trivia leaderboard")
+    parser.add_argument("--key-file", default=LOCAL_KEY_FILE)
+    parser.add_argument("--sheet-url", default=LOCAL_SHEET_URL)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact = subparsers.add_parser("compact", help="Archive cold leaderboard rows")
+    compact.add_argument("--top-per-topic", type=int, default=HOT_TOP_PER_TOPIC)
+    compact.add_argument("--recent-days", type=int, default=HOT_RECENT_DAYS)
+
+    history = subparsers.add_parser("history", help="Show a player's games")
+    history.add_argument("player_name")
+    history.add_argument("--archive-only", action="store_true",
+                         help="Skip the live sheet and only read the archive")
+
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        sheet = open_sheet(args.key_file, args.sheet_url)
+        result = compact_leaderboard(sheet, args.archive_dir,
+                                     args.top_per_topic, args.recent_days)
+        if result["status"] == "locked":
+            print("Another compaction is already running")
+        else:
+            print(f"Kept {result['kept']} rows, archived {result['archived']} rows")
+            if result.get("archive"):
+                print(f"Archive written to {result['archive']}")
+        return
+
+    live_entries = []
+    if not args.archive_only:
+        sheet = open_sheet(args.key_file, args.sheet_url)
+        live_entries = [row_to_entry(row) for row in sheet.get_all_records()]
+
+    games = load_player_history(args.player_name, live_entries, args.archive_dir)
+    for entry in games:
+        print(f"{entry['date']} {entry['time']}  {entry['topic']}: "
+              f"{entry['score']} points ({entry['questions_answered']}/{entry['game_length']})")
+    print(f"{len(games)} games found for {args.player_name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+"""Leaderboard data helpers shared by the Streamlit app and offline jobs.
+
+Nothing in here imports Streamlit, so the same code can run from the
+command line or inside a background worker.
+"""
+import glob
+from array import array
+import gzip
+import heapq
+import json
+import os
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+# Local development credentials (Streamlit Cloud uses st.secrets instead)
+SHEETS_SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+LOCAL_KEY_FILE = "new-year-trivia-game-932d8241aa4e.json"
+LOCAL_SHEET_URL = "https://docs.google.com/spreadsheets/d/1vs_JYu7HqmGiVUZjTdiDemVBhj3APV90Z5aa1jt56-g/edit#gid=0"
+
+# Column layout of the main leaderboard worksheet
+LEADERBOARD_HEADERS = ["Name", "Score", "Topic", "Date", "Time",
+                       "Questions_Answered", "Game_Length", "Submission_Id"]
+
+# Small, maintained worksheet holding only what the UI displays
+SUMMARY_WORKSHEET = "Top Scores"
+SUMMARY_HEADERS = ["Scope"] + LEADERBOARD_HEADERS
+SUMMARY_SIZE = 10
+OVERALL_SCOPE = "*"
+
+# Compaction: what stays in the live worksheet
+ARCHIVE_DIR = "leaderboard_archive"
+HOT_TOP_PER_TOPIC = 25
+HOT_RECENT_DAYS = 30
+DATE_FORMAT = "%b %d, %Y"
+COMPACTION_LOCK_TIMEOUT = 3600  # seconds before a stale lock is ignored
+
+
+def new_submission_id():
+    """Unique id for one game, used to make score submissions idempotent"""
+    return uuid.uuid4().hex
+
+
+def row_to_entry(row):
+    """Convert a worksheet record (header -> value) into a leaderboard entry"""
+    return {
+        "name": row["Name"],
+        "score": row["Score"],
+        "topic": row["Topic"],
+        "date": row["Date"],
+        "time": row["Time"],
+        "questions_answered": row["Questions_Answered"],
+        "game_length": row["Game_Length"],
+        # Rows written before submission ids existed have no id
+        "submission_id": row.get("Submission_Id", "")
+    }
+
+
+def entry_to_row(entry):
+    """Convert a leaderboard entry into a worksheet row"""
+    return [
+        entry["name"],
+        entry["score"],
+        entry["topic"],
+        entry["date"],
+        entry["time"],
+        entry["questions_answered"],
+        entry["game_length"],
+        entry.get("submission_id", "")
+    ]
+
+
+def ranking_key(entry):
+    """Sort key used by every leaderboard view: score first, then date/time"""
+    return (-entry["score"], entry["date"], entry["time"])
+
+
+def topic_scope(topic):
+    """Normalize a topic name: topics are compared case-insensitively"""
+    return str(topic).lower()
+
+
+def build_summary(entries, size=SUMMARY_SIZE):
+    """Build the top-N overall and per-topic summary in a single pass"""
+    entries = list(entries)
+    by_topic = {}
+    for entry in entries:
+        by_topic.setdefault(topic_scope(entry["topic"]), []).append(entry)
+
+    return {
+        "overall": heapq.nsmallest(size, entries, key=ranking_key),
+        "topics": {
+            scope: heapq.nsmallest(size, topic_entries, key=ranking_key)
+            for scope, topic_entries in by_topic.items()
+        }
+    }
+
+
+_ARRAY_COLUMNS = ("names", "topics", "dates", "times", "scores",
+                  "questions_answered", "game_lengths")
+
+
+class ColumnarLeaderboard:
+    """Compact, column-oriented leaderboard.
+
+    Every field lives in its own typed array; names, topics, dates and
+    times are interned into a shared string table and stored as small
+    integer ids. It quacks like the old {index: entry_dict} mapping
+    (len, keys, values, items, [i]) so existing readers keep working,
+    while sorting and filtering run directly on the columns.
+    """
+
+    __slots__ = ("_strings", "_string_ids", "names", "topics", "dates", "times",
+                 "scores", "questions_answered", "game_lengths", "submission_ids")
+
+    def __init__(self):
+        self._strings = []
+        self._string_ids = {}
+        self.names = array("I")
+        self.topics = array("I")
+        self.dates = array("I")
+        self.times = array("I")
+        self.scores = array("i")
+        self.questions_answered = array("H")
+        self.game_lengths = array("H")
+        self.submission_ids = []
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from worksheet records without keeping per-row dicts"""
+        leaderboard = cls()
+        for row in records:
+            leaderboard.append(row_to_entry(row))
+        return leaderboard
+
+    @classmethod
+    def from_entries(cls, entries):
+        leaderboard = cls()
+        for entry in entries:
+            leaderboard.append(entry)
+        return leaderboard
+
+    def to_bytes(self):
+        """Compressed copy of the columns, for sharing a snapshot between processes"""
+        header = json.dumps({"rows": len(self.scores), "strings": self._strings,
+                             "submission_ids": self.submission_ids},
+                            separators=(",", ":")).encode("utf-8")
+        body = b"".join(getattr(self, name).tobytes() for name in _ARRAY_COLUMNS)
+        return zlib.compress(len(header).to_bytes(4, "little") + header + body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild from to_bytes() output without going through per-row dicts"""
+        data = zlib.decompress(data)
+        header_size = int.from_bytes(data[:4], "little")
+        header = json.loads(data[4:4 + header_size])
+        leaderboard = cls()
+        leaderboard._strings = header["strings"]
+        leaderboard._string_ids = {value: i for i, value in enumerate(header["strings"])}
+        leaderboard.submission_ids = header["submission_ids"]
+        offset = 4 + header_size
+        for name in _ARRAY_COLUMNS:
+            column = getattr(leaderboard, name)
+            size = column.itemsize * header["rows"]
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        return leaderboard
+
+    def _intern(self, value):
+        value = str(value)
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    def append(self, entry):
+        """Add one entry; returns its index"""
+        self.names.append(self._intern(entry["name"]))
+        self.topics.append(self._intern(entry["topic"]))
+        self.dates.append(self._intern(entry["date"]))
+        self.times.append(self._intern(entry["time"]))
+        self.scores.append(int(entry["score"] or 0))
+        self.questions_answered.append(int(entry["questions_answered"] or 0))
+        self.game_lengths.append(int(entry["game_length"] or 0))
+        self.submission_ids.append(entry.get("submission_id") or None)
+        return len(self.scores) - 1
+
+    def string(self, string_id):
+        """Look up an interned name/topic/date/time by id"""
+        return self._strings[string_id]
+
+    def row(self, i):
+        """Materialize one entry as the classic dict"""
+        strings = self._strings
+        return {
+            "name": strings[self.names[i]],
+            "score": self.scores[i],
+            "topic": strings[self.topics[i]],
+            "date": strings[self.dates[i]],
+            "time": strings[self.times[i]],
+            "questions_answered": self.questions_answered[i],
+            "game_length": self.game_lengths[i],
+            "submission_id": self.submission_ids[i] or ""
+        }
+
+    # -- mapping compatibility ---------------------------------------------
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, i):
+        return self.row(i)
+
+    def keys(self):
+        return range(len(self.scores))
+
+    def values(self):
+        return (self.row(i) for i in range(len(self.scores)))
+
+    def items(self):
+        return ((i, self.row(i)) for i in range(len(self.scores)))
+
+    # -- column operations ---------------------------------------------------
+    def _rank_key(self, i):
+        strings = self._strings
+        return (-self.scores[i], strings[self.dates[i]], strings[self.times[i]])
+
+    def topic_indexes(self, topic):
+        """Row indexes for a topic (case-insensitive), filtered on the id column"""
+        scope = topic_scope(topic)
+        wanted = {string_id for value, string_id in self._string_ids.items()
+                  if value.lower() == scope}
+        topics = self.topics
+        return [i for i in range(len(topics)) if topics[i] in wanted]
+
+    def rank_of(self, name, score, topic=None, indexes=None):
+        """1-based rank among `indexes` (default: all rows) of the best entry
+        matching name, score and, if given, the exact topic; None if absent"""
+        name_id = self._string_ids.get(str(name))
+        topic_id = self._string_ids.get(str(topic)) if topic is not None else None
+        if name_id is None or (topic is not None and topic_id is None):
+            return None
+        indexes = range(len(self.scores)) if indexes is None else indexes
+        matches = [i for i in indexes
+                   if self.names[i] == name_id and self.scores[i] == score
+                   and (topic_id is None or self.topics[i] == topic_id)]
+        if not matches:
+            return None
+        return 1 + self.count_ahead(min(self._rank_key(i) for i in matches), indexes)
+
+    def count_ahead(self, key, indexes=None):
+        """Rows among `indexes` (default: all) ranked strictly ahead of a
+        ranking_key(), counted without sorting the whole board"""
+        indexes = range(len(self.scores)) if indexes is None else indexes
+        return sum(1 for i in indexes if self._rank_key(i) < key)
+
+
+def rank_with_entries(leaderboard, entry, extra_entries=(), topic=None):
+    """1-based rank of `entry` among a snapshot plus entries it does not hold yet.
+
+    `extra_entries` are rows written after the snapshot was taken (this
+    session's own games); any of them already in the snapshot are skipped,
+    as is `entry` itself. With `topic`, only that topic's rows count.
+    """
+    key = ranking_key(entry)
+    indexes = leaderboard.topic_indexes(topic) if topic is not None else None
+    ahead = leaderboard.count_ahead(key, indexes)
+    known_ids = None
+    for extra in extra_entries:
+        if extra is entry or ranking_key(extra) >= key:
+            continue
+        if topic is not None and topic_scope(extra["topic"]) != topic_scope(topic):
+            continue
+        if known_ids is None:
+            known_ids = set(filter(None, leaderboard.submission_ids))
+        if extra.get("submission_id") not in known_ids:
+            ahead += 1
+    return 1 + ahead
+
+
+def summary_to_rows(summary):
+    """Flatten a summary into worksheet rows (header included)"""
+    rows = [SUMMARY_HEADERS]
+    rows += [[OVERALL_SCOPE] + entry_to_row(e) for e in summary["overall"]]
+    for scope, topic_entries in summary["topics"].items():
+        rows += [[scope] + entry_to_row(e) for e in topic_entries]
+    return rows
+
+
+def records_to_summary(records):
+    """Rebuild a summary from the records of the summary worksheet"""
+    summary = {"overall": [], "topics": {}}
+    for record in records:
+        entry = row_to_entry(record)
+        scope = str(record["Scope"])
+        if scope == OVERALL_SCOPE:
+            summary["overall"].append(entry)
+        else:
+            summary["topics"].setdefault(scope, []).append(entry)
+    return summary
+
+
+def merge_into_summary(summary, new_entries, size=SUMMARY_SIZE):
+    """Fold freshly submitted entries into an existing summary"""
+    merged = {
+        "overall": list(summary["overall"]) if summary else [],
+        "topics": {k: list(v) for k, v in summary["topics"].items()} if summary else {}
+    }
+    for entry in new_entries:
+        scope = topic_scope(entry["topic"])
+        if entry in merged["topics"].get(scope, []):
+            continue  # Already picked up by a summary rebuild
+        merged["overall"] = heapq.nsmallest(size, merged["overall"] + [entry], key=ranking_key)
+        merged["topics"][scope] = heapq.nsmallest(
+            size, merged["topics"].get(scope, []) + [entry], key=ranking_key
+        )
+    return merged
+
+
+def parse_entry_date(entry):
+    """Parse the 'Jan 01, 2025' date stored on each row, or None"""
+    try:
+        return datetime.strptime(str(entry["date"]), DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def split_hot_cold(entries, top_per_topic=HOT_TOP_PER_TOPIC,
+                   recent_days=HOT_RECENT_DAYS, now=None):
+    """Split entries into (hot, cold) index sets.
+
+    Hot rows are the top N per topic plus everything from the recent
+    window. Rows whose date cannot be parsed are always kept hot.
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=recent_days)
+
+    by_topic = {}
+    for i, entry in enumerate(entries):
+        by_topic.setdefault(topic_scope(entry["topic"]), []).append(i)
+
+    hot = set()
+    for indexes in by_topic.values():
+        hot.update(heapq.nsmallest(top_per_topic, indexes,
+                                   key=lambda i: ranking_key(entries[i])))
+
+    for i, entry in enumerate(entries):
+        played = parse_entry_date(entry)
+        if played is None or played >= cutoff:
+            hot.add(i)
+
+    cold = set(range(len(entries))) - hot
+    return hot, cold
+
+
+def write_archive(entries, archive_dir=ARCHIVE_DIR):
+    """Write entries to a new compressed JSONL archive file (atomically)"""
+    os.makedirs(archive_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(archive_dir, f"leaderboard-{stamp}-{os.getpid()}.jsonl.gz")
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def iter_archived_entries(archive_dir=ARCHIVE_DIR):
+    """Stream every archived entry without loading whole files into memory"""
+    for path in sorted(glob.glob(os.path.join(archive_dir, "leaderboard-*.jsonl.gz"))):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_player_history(player_name, live_entries=(), archive_dir=ARCHIVE_DIR):
+    """Return every game for a player from the live store and the archive"""
+    name = str(player_name).lower()
+    history = [e for e in live_entries if str(e["name"]).lower() == name]
+    history += [e for e in iter_archived_entries(archive_dir)
+                if str(e["name"]).lower() == name]
+    return sorted(history, key=lambda e: (parse_entry_date(e) or datetime.min, e["time"]),
+                  reverse=True)
+
+
+def _acquire_compaction_lock(archive_dir):
+    """Create an exclusive lock file; returns its path or None if held"""
+    os.makedirs(archive_dir, exist_ok=True)
+    lock_path = os.path.join(archive_dir, ".compaction.lock")
+    try:
+        if time.time() - os.path.getmtime(lock_path) > COMPACTION_LOCK_TIMEOUT:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return lock_path
+    except FileExistsError:
+        return None
+
+
+def _contiguous_ranges(indexes):
+    """Group sorted indexes into (start, end) half-open ranges"""
+    ranges = []
+    for i in sorted(indexes):
+        if ranges and ranges[-1][1] == i:
+            ranges[-1][1] = i + 1
+        else:
+            ranges.append([i, i + 1])
+    return ranges
+
+
+def compact_leaderboard(sheet, archive_dir=ARCHIVE_DIR,
+                        top_per_topic=HOT_TOP_PER_TOPIC, recent_days=HOT_RECENT_DAYS):
+    """Move cold rows out of the live worksheet into the local archive.
+
+    Safe to run while games are in progress: the app only ever appends
+    rows, and cold rows are removed with a single batch of row deletions
+    (bottom-up) against the snapshot we read, so rows appended meanwhile
+    are untouched. Rows are archived before they are deleted, so a crash
+    can at worst leave a row in both places, never in neither.
+    """
+    lock_path = _acquire_compaction_lock(archive_dir)
+    if lock_path is None:
+        return {"status": "locked"}
+
+    try:
+        entries = [row_to_entry(row) for row in sheet.get_all_records()]
+        hot, cold = split_hot_cold(entries, top_per_topic, recent_days)
+        if not cold:
+            return {"status": "ok", "kept": len(hot), "archived": 0}
+
+        archive_path = write_archive([entries[i] for i in sorted(cold)], archive_dir)
+
+        # Sheet row 1 is the header, so entry i lives at 0-based row i + 1
+        requests = [
+            {"deleteDimension": {"range": {
+                "sheetId": sheet.id,
+                "dimension": "ROWS",
+                "startIndex": start + 1,
+                "endIndex": end + 1
+            }}}
+            for start, end in reversed(_contiguous_ranges(cold))
+        ]
+        sheet.spreadsheet.batch_update({"requests": requests})
+
+        return {"status": "ok", "kept": len(hot), "archived": len(cold),
+                "archive": archive_path}
+    finally:
+        os.remove(lock_path)
@@ -0,0 +1,131 @@
+"""Per-player statistics, aggregated incrementally as games are played.
+
+Each answer and each submitted game updates a small fixed-size record,
+so a player's profile is a single row lookup instead of a scan of the
+leaderboard history. Records are stored one row per player through the
+shared-state backend (see shared_state.py). Nothing in here imports
+Streamlit.
+"""
+import threading
+
+
+class PlayerStats:
+    """Running totals for one player"""
+
+    __slots__ = ("games", "total_score", "best_score", "answered", "correct",
+                 "answer_seconds", "streak", "best_streak", "topics")
+
+    def __init__(self, games=0, total_score=0, best_score=0, answered=0, correct=0,
+                 answer_seconds=0.0, streak=0, best_streak=0, topics=None):
+        self.games = games
+        self.total_score = total_score
+        self.best_score = best_score
+        self.answered = answered
+        self.correct = correct
+        self.answer_seconds = answer_seconds
+        self.streak = streak
+        self.best_streak = best_streak
+        # topic -> [games, total score, best score]
+        self.topics = topics or {}
+
+    def add_answer(self, correct, seconds):
+        self.answered += 1
+        self.answer_seconds += seconds
+        if correct:
+            self.correct += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+
+    def add_game(self, topic, score):
+        self.games += 1
+        self.total_score += score
+        self.best_score = max(self.best_score, score)
+        topic_stats = self.topics.setdefault(str(topic).lower(), [0, 0, 0])
+        topic_stats[0] += 1
+        topic_stats[1] += score
+        topic_stats[2] = max(topic_stats[2], score)
+
+    def to_list(self):
+        return [self.games, self.total_score, self.best_score, self.answered, self.correct,
+                round(self.answer_seconds, 2), self.streak, self.best_streak, self.topics]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def summary(self):
+        """Derived view used by the profile panel"""
+        return {
+            "games": self.games,
+            "average_score": self.total_score / self.games if self.games else 0,
+            "best_score": self.best_score,
+            "accuracy": self.correct / self.answered if self.answered else 0,
+            "average_answer_time": self.answer_seconds / self.answered if self.answered else 0,
+            "current_streak": self.streak,
+            "best_streak": self.best_streak,
+            "topics": {
+                topic: {"games": g, "average_score": total / g if g else 0, "best_score": best}
+                for topic, (g, total, best) in self.topics.items()
+            }
+        }
+
+
+class PlayerStatsStore:
+    """All players' stats as one row per player in a shared-state backend.
+
+    Answers are buffered per player in this process and applied to the
+    player's row together with the game, in one atomic update, so a game
+    over writes a single small row and processes sharing the backend never
+    overwrite each other's updates. Rows are keyed by lower-cased name.
+    """
+
+    def __init__(self, state):
+        self._state = state
+        self._lock = threading.Lock()
+        self._pending = {}  # name -> [(correct, seconds), ...] not yet in the row
+
+    @staticmethod
+    def _key(name):
+        return f"player:{name}"
+
+    def record_answer(self, player, correct, seconds):
+        with self._lock:
+            self._pending.setdefault(str(player).lower(), []).append((bool(correct), seconds))
+
+    def record_game(self, player, topic, score):
+        name = str(player).lower()
+        with self._lock:
+            answers = self._pending.pop(name, [])
+
+        def apply(values):
+            stats = PlayerStats.from_list(values) if values else PlayerStats()
+            for correct, seconds in answers:
+                stats.add_answer(correct, seconds)
+            stats.add_game(topic, score)
+            return stats.to_list()
+
+        try:
+            self._state.update(self._key(name), apply)
+        except Exception as e:
+            print(f"Error saving player stats: {str(e)}")
+            with self._lock:
+                self._pending[name] = answers + self._pending.get(name, [])
+
+    def get(self, player):
+        """Single row lookup; None for players we have never seen"""
+        name = str(player).lower()
+        try:
+            row = self._state.get(self._key(name))
+        except Exception as e:
+            print(f"Error loading player stats: {str(e)}")
+            row = None
+        with self._lock:
+            answers = list(self._pending.get(name, ()))
+        if row is None and not answers:
+            return None
+        stats = PlayerStats.from_list(row[0]) if row else PlayerStats()
+        for correct, seconds in answers:
+            stats.add_answer(correct, seconds)
+        return stats.summary()
@@ -0,0 +1,151 @@
+"""Bulk question pre-generation for popular topics.
+
+Usage:
+    python pregenerate_questions.py "World History" "Space" --count 200
+    python pregenerate_questions.py --topics-file topics.txt --count 100 --workers 8
+
+Questions are generated and validated with the same code the app uses,
+across a bounded worker pool, and written in batches to a gzip JSONL
+file in question_bank/ that the app loads as a question source. The
+output file doubles as the checkpoint: rerunning the same command skips
+what is already there and only generates the remainder.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from trivia_questions import (
+    QUESTION_BANK_DIR, request_question, parse_trivia_response, question_key,
+    append_question_batch, iter_question_file, TokenAccountant
+)
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS_PER_QUESTION = 3
+
+
+def read_checkpoint(path):
+    """Count existing questions per topic and collect their keys"""
+    counts, keys = {}, set()
+    if os.path.exists(path):
+        for q in iter_question_file(path):
+            counts[q["topic"]] = counts.get(q["topic"], 0) + 1
+            keys.add(question_key(q["topic"], q["question"]))
+    return counts, keys
+
+
+def generate_one(client, topic, accountant):
+    """Worker: one model call; returns (topic, parsed question or None)"""
+    return topic, parse_trivia_response(request_question(client, topic, accountant))
+
+
+def pregenerate(client, topics, count, output, workers, accountant=None):
+    """Fill the bank up to `count` questions per topic; returns run stats"""
+    counts, keys = read_checkpoint(output)
+    remaining = {t: max(0, count - counts.get(t, 0)) for t in topics}
+    budget = {t: n * MAX_ATTEMPTS_PER_QUESTION for t, n in remaining.items()}
+    stats = {"accepted": 0, "rejected": 0, "errors": 0, "skipped": sum(counts.get(t, 0) for t in topics)}
+    batch = []
+    in_flight = {}
+    pending = {}
+    started = time.time()
+
+    def next_topic():
+        for t in topics:
+            if remaining[t] > in_flight.get(t, 0) and budget[t] > 0:
+                return t
+        return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                # Keep the pool full without over-submitting any topic
+                while len(pending) < workers:
+                    topic = next_topic()
+                    if topic is None:
+                        break
+                    budget[topic] -= 1
+                    in_flight[topic] = in_flight.get(topic, 0) + 1
+                    pending[pool.submit(generate_one, client, topic, accountant)] = topic
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    topic = pending.pop(future)
+                    in_flight[topic] -= 1
+                    try:
+                        _, question = future.result()
+                    except Exception as e:
+                        stats["errors"] += 1
+                        print(f"Error generating question for {topic}: {str(e)}")
+                        continue
+
+                    if question is None or question_key(topic, question["question"]) in keys:
+                        stats["rejected"] += 1
+                        continue
+
+                    if remaining[topic] <= 0:
+                        continue
+                    keys.add(question_key(topic, question["question"]))
+                    remaining[topic] -= 1
+                    stats["accepted"] += 1
+                    batch.append(dict(question, topic=topic))
+                    if len(batch) >= BATCH_SIZE:
+                        append_question_batch(output, batch)
+                        batch = []
+        finally:
+            # Checkpoint whatever we have, even on Ctrl-C
+            for future in pending:
+                future.cancel()
+            append_question_batch(output, batch)
+
+    stats["elapsed"] = time.time() - started
+    stats["shortfall"] = {t: n for t, n in remaining.items() if n > 0}
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate trivia questions for popular topics")
+    parser.add_argument("topics", nargs="*", help="Topics to warm up")
+    parser.add_argument("--topics-file", help="File with one topic per line")
+    parser.add_argument("--count", type=int, default=100, help="Target questions per topic")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent model requests")
+    parser.add_argument("--output", default=os.path.join(QUESTION_BANK_DIR, "pregenerated.jsonl.gz"))
+    args = parser.parse_args()
+
+    topics = list(args.topics)
+    if args.topics_file:
+        with open(args.topics_file, encoding="utf-8") as f:
+            topics += [line.strip() for line in f if line.strip()]
+    if not topics:
+        parser.error("give at least one topic or --topics-file")
+
+    from dotenv import load_dotenv
+    from openai import OpenAI
+    load_dotenv()
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    accountant = TokenAccountant()
+    stats = pregenerate(client, topics, args.count, args.output, args.workers, accountant)
+
+    attempts = stats["accepted"] + stats["rejected"] + stats["errors"]
+    minutes = max(stats["elapsed"], 1e-9) / 60
+    print(f"Accepted {stats['accepted']} questions "
+          f"({stats['skipped']} already banked) in {stats['elapsed']:.1f}s")
+    print(f"Throughput: {stats['accepted'] / minutes:.1f} questions/min")
+    if attempts:
+        print(f"Rejection rate: {stats['rejected'] / attempts:.1%} "
+              f"({stats['errors']} request errors)")
+    tokens = accountant.snapshot()
+    if tokens["calls"]:
+        print(f"Prompt tokens: {tokens['prompt_tokens']} "
+              f"({tokens['cached_tokens']} cached, {tokens['cache_hit_rate']:.0%}); "
+              f"completion tokens: {tokens['completion_tokens']}; "
+              f"tuned max_tokens: {accountant.max_tokens()}")
+    for topic, missing in stats["shortfall"].items():
+        print(f"  {topic}: {missing} short of target (attempt budget exhausted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Multiplayer rooms: one question set per room, fanned out to every player.
+
+A host opens a room for a topic; the questions are generated once (in a
+background thread) and published to every participant through a small
+in-process pub/sub, so model cost and latency are paid per room instead
+of per player. Players are keyed by a per-session member id, so a
+display name can never collide with or be merged into another session's
+record. Nothing in here imports Streamlit.
+"""
+import queue
+import secrets
+import string
+import threading
+import time
+
+ROOM_CODE_LENGTH = 5
+ROOM_TTL = 3 * 60 * 60  # seconds before an abandoned room is dropped
+
+
+class Room:
+    """State of one multiplayer game, shared by all of its players"""
+
+    def __init__(self, code, host_id, host, topic, game_length):
+        self.code = code
+        self.host_id = host_id
+        self.host = host
+        self.topic = topic
+        self.game_length = game_length
+        self.created_at = time.time()
+        self.started = False
+        self.generation_failed = False
+        self.questions = []
+        self.players = {}
+        self.submitted_players = set()
+        self._submitted = False
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    # -- pub/sub ------------------------------------------------------------
+    def subscribe(self):
+        """Return a queue that receives every event published from now on"""
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event, **data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(dict(data, event=event))
+
+    # -- players ------------------------------------------------------------
+    def join(self, member_id, name):
+        """Add a session to the room; False if another session already uses the name"""
+        with self._lock:
+            for other_id, other in self.players.items():
+                if other_id != member_id and other["name"].lower() == name.lower():
+                    return False
+            self.players.setdefault(member_id, {"name": name, "score": 0, "answers": {},
+                                                "finished": False})
+        self.publish("player_joined", player=name)
+        return True
+
+    def record_answer(self, member_id, index, letter, points):
+        """Store one scored answer (a repeated click on the same question is ignored)"""
+        with self._lock:
+            player = self.players.get(member_id)
+            if player is None:
+                return
+            if index not in player["answers"]:
+                player["answers"][index] = (letter, points)
+                player["score"] += points
+
+    def finish(self, member_id):
+        with self._lock:
+            player = self.players.get(member_id)
+            if player is None or player["finished"]:
+                return
+            player["finished"] = True
+        self.publish("player_finished", player=player["name"])
+
+    def all_finished(self):
+        with self._lock:
+            return all(p["finished"] for p in self.players.values())
+
+    def standings(self):
+        """(name, score, answered, finished) sorted by score, highest first"""
+        return [row[1:] for row in self.results()]
+
+    def results(self):
+        """(member id, name, score, answered, finished) sorted by score, highest first"""
+        with self._lock:
+            return sorted(((member_id, p["name"], p["score"], len(p["answers"]), p["finished"])
+                           for member_id, p in self.players.items()),
+                          key=lambda x: -x[2])
+
+    def claim_submission(self):
+        """True exactly once: whoever gets it submits the room's results.
+
+        Every player with an answer at that moment is part of the batch.
+        """
+        with self._lock:
+            if self._submitted:
+                return False
+            self._submitted = True
+            self.submitted_players = {member_id for member_id, p in self.players.items()
+                                      if p["answers"]}
+            return True
+
+    def submission_claimed(self):
+        with self._lock:
+            return self._submitted
+
+    # -- questions ----------------------------------------------------------
+    def start(self, generate_question):
+        """Generate the question set once, publishing each question as it is ready"""
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+        self.publish("started", topic=self.topic, game_length=self.game_length)
+
+        def produce():
+            seen = set()
+            failures = 0
+            while len(self.questions) < self.game_length and failures < self.game_length:
+                question = generate_question(self.topic, seen)
+                if question is None:
+                    failures += 1
+                    continue
+                self.questions.append(question)
+                self.publish("question", index=len(self.questions) - 1)
+            if len(self.questions) < self.game_length:
+                self.generation_failed = True
+                self.publish("generation_failed")
+
+        threading.Thread(target=produce, name=f"room-{self.code}", daemon=True).start()
+
+    def wait_for_question(self, index, timeout):
+        """Block until question `index` is published (or timeout); returns it or None"""
+        if index < len(self.questions):
+            return self.questions[index]
+        subscriber = self.subscribe()
+        try:
+            deadline = time.time() + timeout
+            while index >= len(self.questions) and not self.generation_failed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    subscriber.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            return self.questions[index] if index < len(self.questions) else None
+        finally:
+            self.unsubscribe(subscriber)
+
+
+class RoomRegistry:
+    """All rooms in this process"""
+
+    def __init__(self):
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def _new_code(self):
+        alphabet = string.ascii_uppercase + string.digits
+        while True:
+            code = "".join(secrets.choice(alphabet) for _ in range(ROOM_CODE_LENGTH))
+            if code not in self._rooms:
+                return code
+
+    def create(self, host_id, host, topic, game_length):
+        with self._lock:
+            self._expire()
+            room = Room(self._new_code(), host_id, host, topic, game_length)
+            self._rooms[room.code] = room
+        room.join(host_id, host)
+        return room
+
+    def get(self, code):
+        with self._lock:
+            return self._rooms.get(str(code).strip().upper())
+
+    def _expire(self):
+        cutoff = time.time() - ROOM_TTL
+        for code in [c for c, r in self._rooms.items() if r.created_at < cutoff]:
+            del self._rooms[code]
@@ -0,0 +1,117 @@
+"""Vectorized score distribution analytics for the game-over screen.
+
+Scores are small non-negative integers, so the distribution is kept as
+NumPy count arrays indexed by score (overall and per topic). Adding a
+game is an O(1) increment; percentile rank, histogram and summary stats
+are a few vectorized operations over at most a couple of thousand bins,
+no matter how many games have been played.
+"""
+import threading
+import time
+
+import numpy as np
+
+from leaderboard_store import topic_scope
+
+HISTOGRAM_BINS = 10
+
+
+class ScoreDistribution:
+    """Score counts overall and per topic, updated incrementally"""
+
+    def __init__(self):
+        self.built_at = time.time()
+        self._lock = threading.Lock()
+        self._overall = np.zeros(1, dtype=np.int64)
+        self._topics = {}
+
+    @classmethod
+    def from_leaderboard(cls, leaderboard):
+        """Build from a ColumnarLeaderboard (zero-copy view of its score column)"""
+        distribution = cls()
+        scores = np.frombuffer(leaderboard.scores, dtype=np.int32) if len(leaderboard) else \
+            np.zeros(0, dtype=np.int32)
+        scores = np.clip(scores, 0, None)
+        distribution._overall = np.bincount(scores, minlength=1).astype(np.int64)
+
+        # Group rows by topic id, then fold case variants into one scope
+        topic_ids = np.frombuffer(leaderboard.topics, dtype=np.uint32) if len(leaderboard) else \
+            np.zeros(0, dtype=np.uint32)
+        for topic_id in np.unique(topic_ids):
+            scope = topic_scope(leaderboard.string(topic_id))
+            counts = np.bincount(scores[topic_ids == topic_id], minlength=1).astype(np.int64)
+            distribution._topics[scope] = _add_counts(distribution._topics.get(scope), counts)
+        return distribution
+
+    def age(self):
+        return time.time() - self.built_at
+
+    def add(self, score, topic):
+        """Record one finished game"""
+        score = max(0, int(score))
+        with self._lock:
+            self._overall = _ensure_size(self._overall, score + 1)
+            self._overall[score] += 1
+            scope = topic_scope(topic)
+            counts = _ensure_size(self._topics.get(scope, np.zeros(1, dtype=np.int64)), score + 1)
+            counts[score] += 1
+            self._topics[scope] = counts
+
+    def _counts(self, topic=None):
+        with self._lock:
+            if topic is None:
+                return self._overall
+            return self._topics.get(topic_scope(topic), np.zeros(1, dtype=np.int64))
+
+    def percentile_rank(self, score, topic=None):
+        """Percent of games that scored strictly lower"""
+        counts = self._counts(topic)
+        total = counts.sum()
+        if total == 0:
+            return None
+        return 100.0 * counts[:max(0, int(score))].sum() / total
+
+    def histogram(self, topic=None, bins=HISTOGRAM_BINS):
+        """(bin lower edges, game counts) with equal-width score bins"""
+        counts = self._counts(topic)
+        nonzero = np.flatnonzero(counts)
+        counts = counts[:nonzero[-1] + 1] if len(nonzero) else counts[:1]
+        width = max(1, -(-len(counts) // bins))
+        padded = np.zeros(width * bins, dtype=np.int64)
+        padded[:len(counts)] = counts
+        per_bin = padded.reshape(bins, width).sum(axis=1)
+        return np.arange(bins) * width, per_bin
+
+    def stats(self, topic=None):
+        """Games, mean, median, p90, best and standard deviation"""
+        counts = self._counts(topic)
+        total = int(counts.sum())
+        if total == 0:
+            return None
+        values = np.arange(len(counts))
+        mean = float((values * counts).sum() / total)
+        cumulative = np.cumsum(counts)
+        return {
+            "games": total,
+            "mean": mean,
+            "median": int(np.searchsorted(cumulative, (total + 1) / 2)),
+            "p90": int(np.searchsorted(cumulative, 0.9 * total)),
+            "best": int(np.flatnonzero(counts)[-1]),
+            "std": float(np.sqrt(((values - mean) ** 2 * counts).sum() / total))
+        }
+
+
+def _ensure_size(counts, size):
+    """Grow a count array (doubling) so index size - 1 is valid"""
+    if len(counts) >= size:
+        return counts
+    grown = np.zeros(max(size, 2 * len(counts)), dtype=np.int64)
+    grown[:len(counts)] = counts
+    return grown
+
+
+def _add_counts(a, b):
+    if a is None:
+        return b
+    size = max(len(a), len(b))
+    return _ensure_size(a, size)[:size] + _ensure_size(b, size)[:size]
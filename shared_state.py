@@ -0,0 +1,309 @@
+"""State shared by every session, and optionally by several app processes.
+
+Streamlit keeps caches per process, so app processes running side by side
+behind a load balancer would each read the sheet and call the model on
+their own. This module is the single place that state is shared through:
+
+    version / get / set  versioned snapshots (leaderboard columns, summary)
+    update               atomic read-modify-write of one snapshot (player stats rows)
+    append / items       bounded lists (recently generated questions per topic)
+    take_token           token-bucket rate limits
+    single_flight        refresh a snapshot in at most one process at a time
+
+Backends are chosen by URL (see open_shared_state):
+
+    memory                 this process only (the default)
+    sqlite:///path/to.db   every process on this host, through one SQLite file
+
+Values must be JSON serializable or bytes. Nothing in here imports Streamlit.
+"""
+from abc import ABC, abstractmethod
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+SINGLE_FLIGHT_LOCK_TTL = 60   # seconds before a crashed holder's lock is ignored
+SINGLE_FLIGHT_WAIT = 10       # seconds to wait for another process's refresh
+SINGLE_FLIGHT_POLL = 0.1
+
+
+class SharedState(ABC):
+    """Interface shared by the backends; single_flight is built on the rest"""
+
+    @abstractmethod
+    def version(self, key):
+        """(version, updated_at) of a snapshot without loading it, or None"""
+
+    @abstractmethod
+    def get(self, key):
+        """(value, version, updated_at) for a snapshot, or None"""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Store a snapshot; returns its new version"""
+
+    @abstractmethod
+    def update(self, key, apply):
+        """Atomically store apply(current value, or None); returns the new value"""
+
+    @abstractmethod
+    def append(self, key, item, maxlen):
+        """Append to a list, keeping only the newest maxlen items"""
+
+    @abstractmethod
+    def items(self, key):
+        """Items of a list, oldest first"""
+
+    @abstractmethod
+    def take_token(self, bucket, rate, capacity):
+        """Take one token (refilled at `rate` per second, up to `capacity`).
+
+        Returns 0 if a token was taken, otherwise the seconds until one is due.
+        """
+
+    @abstractmethod
+    def try_lock(self, key, owner, ttl):
+        """Take a named lock unless someone else holds an unexpired one"""
+
+    @abstractmethod
+    def unlock(self, key, owner):
+        """Release a lock taken with try_lock"""
+
+    def single_flight(self, key, max_age, compute, wait=SINGLE_FLIGHT_WAIT):
+        """Make sure a snapshot is no older than max_age seconds; returns its version.
+
+        Only one caller (across processes) runs compute() for a stale key;
+        the others wait for its result, or keep the stale snapshot after
+        `wait` seconds. Errors from compute() propagate to the caller that
+        ran it. Callers load the value with get() only when the version is
+        new to them, so a large snapshot is decoded once per version.
+        """
+        snapshot = self.version(key)
+        if snapshot and time.time() - snapshot[1] < max_age:
+            return snapshot[0]
+
+        owner = uuid.uuid4().hex
+        deadline = time.time() + wait
+        while True:
+            if self.try_lock(key, owner, SINGLE_FLIGHT_LOCK_TTL):
+                try:
+                    # Someone may have refreshed it while we were waiting
+                    current = self.version(key)
+                    if current and time.time() - current[1] < max_age:
+                        return current[0]
+                    return self.set(key, compute())
+                finally:
+                    self.unlock(key, owner)
+
+            time.sleep(SINGLE_FLIGHT_POLL)
+            current = self.version(key)
+            if current and (snapshot is None or current[0] != snapshot[0]):
+                return current[0]
+            if time.time() >= deadline:
+                if current:
+                    return current[0]
+                return self.set(key, compute())
+
+
+class MemoryState(SharedState):
+    """Process-local backend: shared by sessions, not by processes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._lists = {}
+        self._buckets = {}
+        self._locks = {}
+
+    def version(self, key):
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            return snapshot[1:] if snapshot else None
+
+    def get(self, key):
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            version = self._snapshots[key][1] + 1 if key in self._snapshots else 1
+            self._snapshots[key] = (value, version, time.time())
+            return version
+
+    def update(self, key, apply):
+        with self._lock:
+            value, version, _ = self._snapshots.get(key, (None, 0, None))
+            value = apply(value)
+            self._snapshots[key] = (value, version + 1, time.time())
+            return value
+
+    def append(self, key, item, maxlen):
+        with self._lock:
+            items = self._lists.setdefault(key, [])
+            items.append(item)
+            del items[:-maxlen]
+
+    def items(self, key):
+        with self._lock:
+            return list(self._lists.get(key, ()))
+
+    def take_token(self, bucket, rate, capacity):
+        with self._lock:
+            now = time.time()
+            tokens, updated_at = self._buckets.get(bucket, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                self._buckets[bucket] = (tokens - 1, now)
+                return 0
+            self._buckets[bucket] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def try_lock(self, key, owner, ttl):
+        with self._lock:
+            holder = self._locks.get(key)
+            if holder and holder[0] != owner and holder[1] > time.time():
+                return False
+            self._locks[key] = (owner, time.time() + ttl)
+            return True
+
+    def unlock(self, key, owner):
+        with self._lock:
+            if self._locks.get(key, (None,))[0] == owner:
+                del self._locks[key]
+
+
+class SQLiteState(SharedState):
+    """Backend for several processes on one host, through a SQLite file (WAL mode).
+
+    Bytes values are stored as BLOBs, everything else as JSON text.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS snapshots "
+                       "(key TEXT PRIMARY KEY, value TEXT, version INTEGER, updated_at REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS list_items "
+                       "(seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, item TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS list_items_key ON list_items (key, seq)")
+            db.execute("CREATE TABLE IF NOT EXISTS buckets "
+                       "(name TEXT PRIMARY KEY, tokens REAL, updated_at REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS locks "
+                       "(key TEXT PRIMARY KEY, owner TEXT, expires_at REAL)")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def version(self, key):
+        row = self._connection().execute(
+            "SELECT version, updated_at FROM snapshots WHERE key = ?", (key,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value, version, updated_at FROM snapshots WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value = row[0] if isinstance(row[0], bytes) else json.loads(row[0])
+        return value, row[1], row[2]
+
+    def set(self, key, value):
+        payload = value if isinstance(value, bytes) else json.dumps(value, separators=(",", ":"))
+        with self._transaction() as db:
+            row = db.execute("SELECT version FROM snapshots WHERE key = ?", (key,)).fetchone()
+            version = row[0] + 1 if row else 1
+            db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                       (key, payload, version, time.time()))
+        return version
+
+    def update(self, key, apply):
+        with self._transaction() as db:
+            row = db.execute("SELECT value, version FROM snapshots WHERE key = ?",
+                             (key,)).fetchone()
+            value = apply(json.loads(row[0]) if row else None)
+            db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                       (key, json.dumps(value, separators=(",", ":")),
+                        row[1] + 1 if row else 1, time.time()))
+        return value
+
+    def append(self, key, item, maxlen):
+        with self._transaction() as db:
+            db.execute("INSERT INTO list_items (key, item) VALUES (?, ?)",
+                       (key, json.dumps(item, separators=(",", ":"))))
+            db.execute("DELETE FROM list_items WHERE key = ? AND seq <= "
+                       "(SELECT seq FROM list_items WHERE key = ? "
+                       "ORDER BY seq DESC LIMIT 1 OFFSET ?)", (key, key, maxlen))
+
+    def items(self, key):
+        rows = self._connection().execute(
+            "SELECT item FROM list_items WHERE key = ? ORDER BY seq", (key,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def take_token(self, bucket, rate, capacity):
+        with self._transaction() as db:
+            now = time.time()
+            row = db.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?",
+                             (bucket,)).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                       (bucket, tokens - 1 if wait == 0 else tokens, now))
+            return wait
+
+    def try_lock(self, key, owner, ttl):
+        with self._transaction() as db:
+            now = time.time()
+            row = db.execute("SELECT owner, expires_at FROM locks WHERE key = ?",
+                             (key,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            db.execute("INSERT OR REPLACE INTO locks VALUES (?, ?, ?)", (key, owner, now + ttl))
+            return True
+
+    def unlock(self, key, owner):
+        with self._transaction() as db:
+            db.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so read-modify-write is atomic across processes"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        return self._db
+
+    def __exit__(self, exc_type, exc, tb):
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def open_shared_state(url=None):
+    """Backend for a URL: 'memory' (default) or 'sqlite:///path/to.db'"""
+    url = (url or "memory").strip()
+    if url == "memory":
+        return MemoryState()
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported shared state URL: {url}")
@@ -0,0 +1,117 @@
+"""Process-wide Google Sheets connection shared by every session.
+
+One authorized gspread client and worksheet handle per process: sessions
+borrow it instead of repeating the OAuth credential build, authorize and
+open_by_url round trips. The access token is renewed before it expires,
+the underlying HTTP session keeps connections alive, and a periodic
+health check reconnects after failures. Connect attempts go through an
+optional circuit breaker and back off after a failure, and every HTTP
+call has a timeout, so an outage never queues sessions on the pool lock.
+"""
+import threading
+import time
+
+import gspread
+from requests.adapters import HTTPAdapter
+
+TOKEN_REFRESH_INTERVAL = 45 * 60   # service account tokens live for an hour
+HEALTH_CHECK_INTERVAL = 60         # seconds between liveness probes
+HTTP_POOL_SIZE = 16                # keep-alive connections per host
+HTTP_TIMEOUT = 10                  # seconds per Sheets API call (gspread has none)
+CONNECT_BACKOFF = 5                # seconds after a failed connect, doubling up to
+CONNECT_BACKOFF_MAX = 120          # this many
+
+
+def _http_session(client):
+    """Return the requests.Session used by a gspread client (v5 and v6)"""
+    http_client = getattr(client, "http_client", None)
+    return getattr(http_client, "session", None) or getattr(client, "session", None)
+
+
+class SheetsClientPool:
+    """Lazily connected, self-healing gspread client and worksheet handles"""
+
+    def __init__(self, creds_factory, sheet_url, breaker=None):
+        self._creds_factory = creds_factory
+        self._sheet_url = sheet_url
+        self._breaker = breaker
+        self._connect_failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._client = None
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._authorized_at = 0.0
+        self._checked_at = 0.0
+
+    def _connect(self):
+        """Build credentials, authorize and open the spreadsheet"""
+        self._client = None
+        if time.time() < self._retry_at:
+            raise ConnectionError("Google Sheets connect is backing off after a failure")
+        if self._breaker is not None and not self._breaker.allow():
+            raise ConnectionError("Google Sheets is unavailable")
+        try:
+            client = gspread.authorize(self._creds_factory())
+            if hasattr(client, "set_timeout"):
+                client.set_timeout(HTTP_TIMEOUT)
+            session = _http_session(client)
+            if session is not None:
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+            spreadsheet = client.open_by_url(self._sheet_url)
+        except Exception:
+            self._connect_failures += 1
+            self._retry_at = time.time() + min(
+                CONNECT_BACKOFF * 2 ** (self._connect_failures - 1), CONNECT_BACKOFF_MAX
+            )
+            if self._breaker is not None:
+                self._breaker.record_failure()
+            raise
+        if self._breaker is not None:
+            self._breaker.record_success()
+        self._connect_failures = 0
+        # Only a fully opened spreadsheet counts as connected
+        self._client = client
+        self._spreadsheet = spreadsheet
+        self._worksheets = {}
+        self._authorized_at = self._checked_at = time.time()
+
+    def _healthy(self):
+        """Cheap metadata call to confirm the connection still works"""
+        try:
+            self._spreadsheet.fetch_sheet_metadata()
+            return True
+        except Exception as e:
+            print(f"Sheets health check failed: {str(e)}")
+            return False
+
+    def _ensure_connected(self):
+        now = time.time()
+        if self._client is None or now - self._authorized_at > TOKEN_REFRESH_INTERVAL:
+            self._connect()
+        elif now - self._checked_at > HEALTH_CHECK_INTERVAL:
+            self._checked_at = now
+            if not self._healthy():
+                self._connect()
+
+    def worksheet(self, title=None):
+        """Return a worksheet handle (the first sheet when title is None)"""
+        with self._lock:
+            self._ensure_connected()
+            if title not in self._worksheets:
+                if title is None:
+                    self._worksheets[title] = self._spreadsheet.sheet1
+                else:
+                    try:
+                        self._worksheets[title] = self._spreadsheet.worksheet(title)
+                    except gspread.WorksheetNotFound:
+                        self._worksheets[title] = self._spreadsheet.add_worksheet(
+                            title=title, rows=100, cols=10
+                        )
+            return self._worksheets[title]
+
+    def invalidate(self):
+        """Drop the connection so the next call reconnects"""
+        with self._lock:
+            self._client = None
@@ -0,0 +1,152 @@
+"""Per-answer telemetry: an append-only event stream in compact columnar files.
+
+Every answer (or timeout) from every session becomes one small event in
+an in-memory buffer, which costs a tuple append on the rerun path. A
+background thread flushes the buffer in batches: each batch is one
+compressed NumPy .npz file holding one array per column, with string
+columns dictionary-encoded, so difficulty and latency analysis can load
+just the columns it needs. Nothing in here imports Streamlit.
+"""
+import atexit
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+
+TELEMETRY_DIR = "telemetry"
+FLUSH_EVENTS = 1000       # flush as soon as this many events are buffered
+FLUSH_INTERVAL = 60       # seconds; flush whatever is buffered at least this often
+MAX_BUFFERED = 50_000     # events kept while writes fail; the oldest are dropped
+
+# Column name -> dtype; string columns are stored as codes plus a value table
+NUMERIC_COLUMNS = {
+    "timestamp": np.float64,
+    "question_index": np.int16,
+    "choice": np.int8,               # 0-3 for A-D, -1 when the timer ran out
+    "correct": np.bool_,
+    "timed_out": np.bool_,
+    "answer_seconds": np.float32,
+    "generation_seconds": np.float32,  # NaN when unknown
+    "points": np.int32,
+    "render_overhead": np.float32,   # question generated -> rendered; NaN when unknown
+    "answer_overhead": np.float32,   # click received -> answer scored; NaN when unknown
+}
+STRING_COLUMNS = ("player", "topic", "question_key", "source")
+EVENT_FIELDS = ("timestamp", "player", "topic", "question_key", "source", "question_index",
+                "choice", "correct", "timed_out", "answer_seconds", "generation_seconds",
+                "points", "render_overhead", "answer_overhead")
+
+
+class AnswerEventLog:
+    """Buffered, batch-flushed stream of answer events for this process"""
+
+    def __init__(self, directory=TELEMETRY_DIR, flush_events=FLUSH_EVENTS,
+                 flush_interval=FLUSH_INTERVAL):
+        self._directory = directory
+        self._flush_events = flush_events
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._buffer = []
+        self._batches = 0
+        self.dropped = 0
+        self._thread = None
+
+    def record(self, player, topic, question_key, source, question_index, choice,
+               correct, timed_out, answer_seconds, generation_seconds=None, points=0,
+               render_overhead=None, answer_overhead=None):
+        """Buffer one answer event (no I/O)"""
+        letter = str(choice or "").strip().upper()[:1]
+        event = (time.time(), str(player), str(topic), str(question_key or ""),
+                 str(source or ""), int(question_index),
+                 "ABCD".index(letter) if letter and letter in "ABCD" else -1,
+                 bool(correct), bool(timed_out), float(answer_seconds),
+                 _seconds(generation_seconds), int(points), _seconds(render_overhead),
+                 _seconds(answer_overhead))
+        with self._lock:
+            self._buffer.append(event)
+            if len(self._buffer) > MAX_BUFFERED:
+                self.dropped += len(self._buffer) - MAX_BUFFERED
+                del self._buffer[:-MAX_BUFFERED]
+            full = len(self._buffer) >= self._flush_events
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far as one batch file"""
+        with self._write_lock:
+            with self._lock:
+                events, self._buffer = self._buffer, []
+            if not events:
+                return
+            try:
+                self._write(events)
+            except (OSError, ValueError) as e:
+                print(f"Error writing telemetry: {str(e)}")
+                with self._lock:
+                    # Keep them for the next flush, ahead of newer events
+                    self._buffer[:0] = events
+                    if len(self._buffer) > MAX_BUFFERED:
+                        self.dropped += len(self._buffer) - MAX_BUFFERED
+                        del self._buffer[:-MAX_BUFFERED]
+
+    def _write(self, events):
+        columns = {}
+        fields = dict(zip(EVENT_FIELDS, zip(*events)))
+        for name, dtype in NUMERIC_COLUMNS.items():
+            columns[name] = np.array(fields[name], dtype=dtype)
+        for name in STRING_COLUMNS:
+            values, codes = np.unique(np.array(fields[name], dtype=str), return_inverse=True)
+            columns[f"{name}_values"] = values
+            columns[f"{name}_codes"] = codes.astype(np.int32)
+
+        os.makedirs(self._directory, exist_ok=True)
+        self._batches += 1
+        name = f"answers-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._batches:05d}.npz"
+        path = os.path.join(self._directory, name)
+        # Write under a temporary name so readers never see a partial batch
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(path + ".tmp", path)
+
+
+def _seconds(value):
+    return float("nan") if value is None else float(value)
+
+
+def load_answer_events(directory=TELEMETRY_DIR, columns=None):
+    """Concatenate every batch into {column: array}; string columns are decoded.
+
+    Pass `columns` to load only some of them (the others are never decompressed).
+    Overhead columns are NaN in batches written before they were added.
+    """
+    wanted = columns or list(NUMERIC_COLUMNS) + list(STRING_COLUMNS)
+    parts = {name: [] for name in wanted}
+    for path in sorted(glob.glob(os.path.join(directory, "answers-*.npz"))):
+        with np.load(path) as batch:
+            for name in wanted:
+                if name in NUMERIC_COLUMNS and name not in batch.files:
+                    parts[name].append(np.full(len(batch["timestamp"]), np.nan,
+                                               dtype=NUMERIC_COLUMNS[name]))
+                elif name in NUMERIC_COLUMNS:
+                    parts[name].append(batch[name])
+                else:
+                    parts[name].append(batch[f"{name}_values"][batch[f"{name}_codes"]])
+    return {
+        name: np.concatenate(arrays) if arrays else
+        np.zeros(0, dtype=NUMERIC_COLUMNS.get(name, str))
+        for name, arrays in parts.items()
+    }
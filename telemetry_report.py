@@ -0,0 +1,65 @@
+"""Question difficulty and latency report from the per-answer telemetry.
+
+Usage:
+    python telemetry_report.py [--dir telemetry] [--min-answers 5] [--top 10]
+"""
+import argparse
+
+import numpy as np
+
+from telemetry import TELEMETRY_DIR, load_answer_events
+
+
+def percentile(values, q):
+    values = values[~np.isnan(values)]
+    return float(np.percentile(values, q)) if len(values) else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=TELEMETRY_DIR)
+    parser.add_argument("--min-answers", type=int, default=5,
+                        help="answers a question needs before it is ranked by difficulty")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    events = load_answer_events(args.dir)
+    total = len(events["correct"])
+    if not total:
+        print(f"No telemetry in {args.dir}/")
+        return
+    print(f"{total:,} answers, accuracy {events['correct'].mean():.1%}, "
+          f"timeouts {events['timed_out'].mean():.1%}")
+
+    print("\nBy topic:")
+    topics, topic_codes = np.unique(np.char.lower(events["topic"]), return_inverse=True)
+    answers = np.bincount(topic_codes)
+    correct = np.bincount(topic_codes, weights=events["correct"])
+    seconds = np.bincount(topic_codes, weights=events["answer_seconds"])
+    for i in np.argsort(-answers)[:args.top]:
+        print(f"  {topics[i]:30s} {answers[i]:7d} answers  {correct[i] / answers[i]:6.1%} correct  "
+              f"{seconds[i] / answers[i]:5.1f}s avg")
+
+    print(f"\nHardest questions (at least {args.min_answers} answers):")
+    keys, key_codes = np.unique(events["question_key"], return_inverse=True)
+    answers = np.bincount(key_codes)
+    accuracy = np.bincount(key_codes, weights=events["correct"]) / answers
+    ranked = [i for i in np.argsort(accuracy) if answers[i] >= args.min_answers and keys[i]]
+    for i in ranked[:args.top]:
+        print(f"  {accuracy[i]:6.1%} of {answers[i]:4d}  {keys[i][:90]}")
+
+    print("\nQuestion generation latency by source (p50 / p90 / p99):")
+    for source in np.unique(events["source"]):
+        latency = events["generation_seconds"][events["source"] == source].astype(np.float64)
+        print(f"  {source or 'unknown':10s} {percentile(latency, 50):6.2f}s "
+              f"{percentile(latency, 90):6.2f}s {percentile(latency, 99):6.2f}s")
+
+    print("\nServing overhead (p50 / p90 / p99):")
+    for column in ("render_overhead", "answer_overhead"):
+        overhead = events[column].astype(np.float64) * 1000
+        print(f"  {column:16s} {percentile(overhead, 50):7.0f}ms "
+              f"{percentile(overhead, 90):7.0f}ms {percentile(overhead, 99):7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
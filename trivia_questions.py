@@ -0,0 +1,488 @@
+"""Trivia question prompt, parsing and the pre-generated question bank.
+
+Nothing in here imports Streamlit, so the app and the bulk
+pre-generation CLI (pregenerate_questions.py) share the same code.
+"""
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeoutError, wait)
+
+QUESTION_MODEL = "gpt-4o"
+QUESTION_BANK_DIR = "question_bank"
+VERDICTS_FILE = os.path.join(QUESTION_BANK_DIR, "verdicts.jsonl")
+VERIFIER_WORKERS = 4
+# Per-call token usage is always recorded by TokenAccountant; printing it is for profiling
+LOG_TOKEN_USAGE = os.getenv("TRIVIA_PROFILE_STARTUP") == "1"
+
+
+# Static instructions go first and never change, so every call (for every
+# topic) shares the same prompt prefix and provider-side prompt caching can
+# reuse it. Only the short final user message varies.
+QUESTION_INSTRUCTIONS = """You are a subject-matter expert creating concise, accurate trivia questions. Focus on interesting but verifiable facts.
+
+Create a concise but challenging trivia question about the topic given in the user message.
+
+Requirements:
+1. Question must be unique and specific to the topic
+2. Length: Question should be 2-4 sentences maximum
+3. All answer choices must be:
+   - Distinctly different from each other
+   - Similar in length and complexity, and detailed
+   - Plausible but with only one and only one clearly correct answer
+4. Fact check must be concise (max 3 sentences) and definitively prove the correct answer
+
+CRITICAL: Each answer choice must be meaningfully different from the others.
+
+Format:
+QUESTION: [Concise question about the topic]
+A) [Distinct answer]
+B) [Distinct answer]
+C) [Distinct answer]
+D) [Distinct answer]
+CORRECT: [A, B, C, or D]
+FACT CHECK: [Brief verification of correct answer]
+
+The question key must be unique to prevent duplicates."""
+
+DEFAULT_MAX_TOKENS = 650
+MIN_MAX_TOKENS = 200
+MAX_TOKENS_HEADROOM = 1.25   # margin over the observed p99 completion size
+MAX_TOKENS_MIN_SAMPLES = 20  # observations needed before tuning kicks in
+TOKEN_SAMPLE_WINDOW = 500
+
+HEDGE_PERCENTILE = 0.9       # hedge once a call is slower than this share of recent calls
+HEDGE_DEFAULT_DELAY = 8.0    # seconds, until enough latencies have been observed
+HEDGE_MIN_DELAY = 2.0        # never hedge sooner than this
+HEDGE_BUDGET = 0.05          # extra calls allowed, as a fraction of requests
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_IN_FLIGHT = 8     # outstanding hedge calls; beyond this, slow calls are not hedged
+HEDGE_REPORT_EVERY = 50      # requests between latency reports in the log
+LATENCY_WINDOW = 500
+
+
+def build_question_prompt(topic):
+    """Return the chat messages used to generate one question (static prefix first)"""
+    return [
+        {"role": "system", "content": QUESTION_INSTRUCTIONS},
+        {"role": "user", "content": f"Topic: {topic}"}
+    ]
+
+
+class TokenAccountant:
+    """Track prompt/cached/completion tokens and tune max_tokens from them"""
+
+    def __init__(self, window=TOKEN_SAMPLE_WINDOW):
+        self._lock = threading.Lock()
+        self._completions = deque(maxlen=window)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.truncated = 0
+
+    def max_tokens(self):
+        """p99 of recent completion sizes plus headroom, within sane bounds"""
+        with self._lock:
+            if len(self._completions) < MAX_TOKENS_MIN_SAMPLES:
+                return DEFAULT_MAX_TOKENS
+            sizes = sorted(self._completions)
+        p99 = sizes[min(len(sizes) - 1, int(len(sizes) * 0.99))]
+        return max(MIN_MAX_TOKENS, min(DEFAULT_MAX_TOKENS, int(p99 * MAX_TOKENS_HEADROOM)))
+
+    def record(self, response):
+        """Record usage from a chat completion response; returns it as a dict"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        truncated = response.choices[0].finish_reason == "length"
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.cached_tokens += cached
+            self.completion_tokens += usage.completion_tokens
+            self.truncated += truncated
+            self._completions.append(usage.completion_tokens)
+        return {"prompt": usage.prompt_tokens, "cached": cached,
+                "uncached": usage.prompt_tokens - cached,
+                "completion": usage.completion_tokens, "truncated": truncated}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "uncached_tokens": self.prompt_tokens - self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cache_hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0,
+                "truncated": self.truncated
+            }
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class HedgedRequester:
+    """Cut the latency tail of question generation with budgeted hedging.
+
+    The first call goes out immediately. If it is still running after the
+    observed p90 latency, a second identical call is fired (while the hedge
+    budget allows) and the first response that passes validation wins.
+
+    Every call gets its own thread, so requests never queue behind each
+    other or behind a hedge loser, whose result is simply dropped when it
+    returns (the client timeout bounds how long that takes). At most
+    HEDGE_MAX_IN_FLIGHT hedges run at once, so an incident cannot turn
+    hedging into a thread pile-up.
+    """
+
+    def __init__(self, budget=HEDGE_BUDGET, percentile=HEDGE_PERCENTILE,
+                 max_in_flight=HEDGE_MAX_IN_FLIGHT):
+        self.budget = budget
+        self.percentile = percentile
+        self.max_in_flight = max_in_flight
+        self._hedges_in_flight = 0
+        self._lock = threading.Lock()
+        # Latency of every call on its own, and of what the caller actually waited
+        self._call_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._served_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def threshold(self):
+        """Seconds to wait on the first call before hedging"""
+        with self._lock:
+            if len(self._call_latencies) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY
+            latencies = list(self._call_latencies)
+        return max(HEDGE_MIN_DELAY, _percentile(latencies, self.percentile))
+
+    def _timed(self, call):
+        started = time.time()
+        result = call()
+        with self._lock:
+            self._call_latencies.append(time.time() - started)
+        return result
+
+    def _start(self, call):
+        """Run call() on a thread of its own; returns a Future for its result"""
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._timed(call))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="question-call", daemon=True).start()
+        return future
+
+    def _take_hedge(self):
+        # One hedge of slack so the first slow call can be hedged too
+        with self._lock:
+            if (self.hedges + 1 > self.budget * self.requests + 1
+                    or self._hedges_in_flight >= self.max_in_flight):
+                return False
+            self.hedges += 1
+            self._hedges_in_flight += 1
+            return True
+
+    def _hedge_done(self, future):
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    def request(self, call, validate):
+        """Run call() (hedged if slow); return validate(result) of the first valid one.
+
+        Returns None if every call returned something invalid, and re-raises
+        the last error if every call failed.
+        """
+        started = time.time()
+        with self._lock:
+            self.requests += 1
+            report = self.requests % HEDGE_REPORT_EVERY == 0
+        primary = self._start(call)
+        pending = {primary}
+        done, _ = wait(pending, timeout=self.threshold())
+        if not done and self._take_hedge():
+            hedge = self._start(call)
+            hedge.add_done_callback(self._hedge_done)
+            pending.add(hedge)
+
+        parsed = error = None
+        while pending and parsed is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    parsed = validate(future.result())
+                except Exception as e:
+                    error = e
+                    continue
+                if parsed is not None:
+                    with self._lock:
+                        self.hedge_wins += future is not primary
+                    break
+
+        with self._lock:
+            self._served_latencies.append(time.time() - started)
+        if report:
+            self.log_report()
+        if parsed is None and error is not None:
+            raise error
+        return parsed
+
+    def snapshot(self):
+        """Hedge volume and the latency tail with and without hedging"""
+        with self._lock:
+            calls = list(self._call_latencies)
+            served = list(self._served_latencies)
+            snapshot = {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0,
+                "hedge_wins": self.hedge_wins
+            }
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            snapshot[f"unhedged_{name}"] = _percentile(calls, fraction)
+            snapshot[f"served_{name}"] = _percentile(served, fraction)
+        return snapshot
+
+    def log_report(self):
+        report = self.snapshot()
+        if report["served_p99"] is None:
+            return
+        print(f"[hedge] {report['requests']} requests, {report['hedges']} hedges "
+              f"({report['hedge_rate']:.1%}, {report['hedge_wins']} won); "
+              f"p99 {report['unhedged_p99']:.2f}s unhedged -> {report['served_p99']:.2f}s served")
+
+
+def request_question(client, topic, accountant=None):
+    """Ask the model for one question and return the raw response text"""
+    max_tokens = accountant.max_tokens() if accountant else DEFAULT_MAX_TOKENS
+    response = client.chat.completions.create(
+        model=QUESTION_MODEL,  # Using full GPT-4 instead of turbo
+        messages=build_question_prompt(topic),
+        temperature=0.9,  # Increased for more variety
+        max_tokens=max_tokens,
+        presence_penalty=0.6,  # Encourage more diverse responses
+        frequency_penalty=0.6  # Discourage repetitive answers
+    )
+    if accountant:
+        usage = accountant.record(response)
+        if usage and LOG_TOKEN_USAGE:
+            print(f"[tokens] prompt {usage['prompt']} (cached {usage['cached']}), "
+                  f"completion {usage['completion']}, max_tokens {max_tokens}")
+    return response.choices[0].message.content
+
+
+def parse_trivia_response(text):
+    """Parse and validate a model response; returns None if it is unusable"""
+    question = None
+    choices = []
+    correct_answer = None
+    fact_check = None
+
+    for line in (text or "").strip().split("\n"):
+        line = line.strip()
+        if line.startswith("QUESTION:"):
+            question = line.replace("QUESTION:", "").strip()
+        elif line.startswith(("A)", "B)", "C)", "D)")):
+            choices.append(line)
+        elif line.startswith("CORRECT:"):
+            correct_answer = line.replace("CORRECT:", "").strip()
+        elif line.startswith("FACT CHECK:"):
+            fact_check = line.replace("FACT CHECK:", "").strip()
+
+    # Validate response format
+    if not all([question, len(choices) == 4, correct_answer, fact_check]):
+        return None
+
+    # Validate answer choices are distinct
+    answer_texts = [c.split(")", 1)[1].strip().lower() for c in choices]
+    if len(set(answer_texts)) != 4:
+        return None
+
+    return {
+        "question": question,
+        "choices": choices,
+        "correct": correct_answer,
+        "fact_check": fact_check
+    }
+
+
+def question_key(topic, question):
+    """Key used to detect repeated questions"""
+    return f"{topic}:{question}"
+
+
+def append_question_batch(path, questions):
+    """Append questions to a gzip JSONL file as one self-contained member.
+
+    Each batch is its own gzip member, so an interrupted run loses at most
+    the batch in flight and the file stays readable.
+    """
+    if not questions:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for q in questions:
+            f.write(json.dumps(q, separators=(",", ":")) + "\n")
+
+
+def iter_question_file(path):
+    """Stream questions from a gzip JSONL file, stopping at a torn tail"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except (EOFError, OSError, zlib.error, json.JSONDecodeError) as e:
+        print(f"Stopped reading {path} at a damaged record: {str(e)}")
+
+
+def load_question_bank(bank_dir=QUESTION_BANK_DIR):
+    """Load every banked question, grouped by lower-cased topic"""
+    bank = {}
+    for path in sorted(glob.glob(os.path.join(bank_dir, "*.jsonl.gz"))):
+        for q in iter_question_file(path):
+            bank.setdefault(str(q["topic"]).lower(), []).append(q)
+    return bank
+
+
+def build_verification_prompt(question):
+    """Return the chat messages for an independent check of a question's answer key"""
+    choices = "\n".join(question["choices"])
+    prompt = f"""Independently answer this multiple choice trivia question, then judge it.
+
+    QUESTION: {question["question"]}
+    {choices}
+
+    Reply in exactly this format:
+    ANSWER: [A, B, C, or D, or NONE if no choice is correct]
+    VALID: [YES if exactly one choice is correct, otherwise NO]
+    REASON: [One sentence]"""
+
+    return [
+        {"role": "system", "content": "You are a meticulous fact-checker for trivia questions."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_verification_response(text, marked_answer):
+    """Turn the verifier's reply into a verdict dict, or None if unparseable"""
+    answer = valid = reason = None
+    for line in (text or "").strip().split("\n"):
+        line = line.strip()
+        if line.startswith("ANSWER:"):
+            answer = line.replace("ANSWER:", "").strip().upper()[:1]
+        elif line.startswith("VALID:"):
+            valid = line.replace("VALID:", "").strip().upper().startswith("YES")
+        elif line.startswith("REASON:"):
+            reason = line.replace("REASON:", "").strip()
+
+    if answer is None or valid is None:
+        return None
+    if not valid or answer not in ("A", "B", "C", "D"):
+        return {"status": "invalid", "correct": None, "reason": reason}
+    if answer != str(marked_answer).strip().upper()[:1]:
+        return {"status": "corrected", "correct": answer, "reason": reason}
+    return {"status": "ok", "correct": answer, "reason": reason}
+
+
+class QuestionVerifier:
+    """Background second-pass fact check with a shared verdict cache.
+
+    Verification runs on a small thread pool while the player reads the
+    question. Verdicts are keyed by question key, so a question is verified
+    once no matter how many players see it, and persisted next to the
+    question bank so restarts keep them.
+    """
+
+    def __init__(self, client_factory, verdicts_file=VERDICTS_FILE, workers=VERIFIER_WORKERS):
+        self._client_factory = client_factory
+        self._verdicts_file = verdicts_file
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verifier")
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._verdicts = {}
+        if os.path.exists(verdicts_file):
+            with open(verdicts_file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._verdicts[record["key"]] = record["verdict"]
+                    except (ValueError, KeyError):
+                        continue
+
+    def submit(self, key, question):
+        """Start verifying a question unless it is already verified or in flight"""
+        with self._lock:
+            if key in self._verdicts or key in self._futures:
+                return
+            self._futures[key] = self._executor.submit(self._verify, key, question)
+
+    def _verify(self, key, question):
+        try:
+            response = self._client_factory().chat.completions.create(
+                model=QUESTION_MODEL,
+                messages=build_verification_prompt(question),
+                temperature=0,
+                max_tokens=120
+            )
+            verdict = parse_verification_response(
+                response.choices[0].message.content, question["correct"]
+            )
+        except Exception as e:
+            print(f"Error verifying question: {str(e)}")
+            verdict = None
+
+        with self._lock:
+            self._futures.pop(key, None)
+            if verdict is not None:
+                self._verdicts[key] = verdict
+                self._persist(key, verdict)
+        return verdict
+
+    def _persist(self, key, verdict):
+        try:
+            directory = os.path.dirname(self._verdicts_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self._verdicts_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "verdict": verdict}, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"Error saving verdict: {str(e)}")
+
+    def cached(self, key):
+        """Verdict if already known, without waiting"""
+        with self._lock:
+            return self._verdicts.get(key)
+
+    def result(self, key, timeout):
+        """Verdict for a question, waiting at most `timeout` seconds; None if unknown"""
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            future = self._futures.get(key)
+        if verdict is not None or future is None:
+            return verdict
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None